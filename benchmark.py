@@ -0,0 +1,694 @@
+# Benchmarks for the pipeline stages, all offline, run with: python benchmark.py [benchmark ...] [--rows N]
+# The pipeline benchmark times every stage on synthetic Stats Canada tables and a scaled Job Bank page
+# and compares the times with benchmark_baseline.json: python benchmark.py pipeline [--scales 1 10 100]
+import argparse
+import http.client
+import io
+import json
+import numpy as np
+import os
+import pandas as pd
+import re
+import tempfile
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import server
+import statcan
+import wages_hours
+from compact import align_categories, memory_mb
+from enrichment import insert_rates_as_of
+from exports import export_partitions
+from normalization import clean_sector_names, map_labels, remove_square_brackets
+from occupation_history import OccupationHistory, archive_snapshot
+from occupations import build_occupations, clean_wage_table, extract_wage_table, map_sectors, occupations_output
+from outputs import write_csv_if_changed, write_parquet_dataset
+from reference_rates import effective_from_year, load_reference_rates
+from rollup import ALL, update_rollup
+from validation import validate_frame
+
+NAICS = 'North American Industry Classification System (NAICS)'
+wage_report_fixture = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'wagereport_ab.html')
+baseline_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+sectors = ['Total employees, all industries', 'Goods-producing sector', 'Agriculture [111-112, 1100, 1151-1152]',
+           'Forestry, fishing, mining, quarrying, oil and gas [21, 113-114, 1153, 2100]', 'Utilities [22]',
+           'Construction [23]', 'Manufacturing [31-33]', 'Services-producing sector', 'Wholesale and retail trade [41, 44-45]',
+           'Transportation and warehousing [48-49]', 'Finance, insurance, real estate, rental and leasing [52-53]',
+           'Professional, scientific and technical services [54]', 'Business, building and other support services [55-56]',
+           'Educational services [61]', 'Health care and social assistance [62]', 'Information, culture and recreation [51, 71]',
+           'Accommodation and food services [72]', 'Other services (except public administration) [81]', 'Public administration [91]']
+
+# Build a frame shaped like the merged wages and hours data with the given number of rows
+def synthetic_wages_and_hours(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'REF_DATE': pd.to_datetime('2006-01-01') + pd.to_timedelta(rng.integers(0, 6500, rows), unit='D'),
+        'GEO': 'Alberta',
+        'Type of work': 'Both full- and part-time employees',
+        NAICS: rng.choice(sectors, rows),
+        'Sex': rng.choice(['Both sexes', 'Males', 'Females'], rows),
+        'Age group': rng.choice(['15 years and over', '15 to 24 years', '25 to 54 years', '55 years and over'], rows),
+        'UOM_wages': 'Current dollars',
+        'Hourly Wage': rng.uniform(15, 60, rows).round(2),
+        'Weekly Wage': rng.uniform(500, 2500, rows).round(2),
+        'Actual hours worked': 'Average actual hours (worked in reference week, main job)',
+        'UOM_hours': 'Hours',
+        'Weekly Hours': rng.uniform(20, 45, rows).round(1),
+    })
+
+# The sector name cleaning loop the script used before, kept to compare against
+def legacy_clean_sector_names(df):
+    for NAIC in df[NAICS].unique():
+        df.replace(NAIC, remove_square_brackets(NAIC), inplace=True)
+
+# Time a function on its own copy of the frame, returning seconds and the resulting frame
+def time_stage(function, df, *args):
+    df = df.copy()
+    start = time.perf_counter()
+    function(df, *args)
+    return time.perf_counter() - start, df
+
+def benchmark_clean_sector_names(rows):
+    df = synthetic_wages_and_hours(rows)
+    legacy_time, legacy_df = time_stage(legacy_clean_sector_names, df)
+    new_time, new_df = time_stage(clean_sector_names, df, NAICS)
+    print(f'clean_sector_names ({rows:,} rows): legacy {legacy_time:.3f}s, vectorized {new_time:.3f}s, '
+          f'{legacy_time / new_time:.1f}x faster')
+
+# Minimum wage of every row looked up date by date, kept to compare against the as-of join
+def looped_minimum_wages(df, rates):
+    rates = rates.sort_values('EFFECTIVE_DATE')
+    minimum_wages = pd.Series(np.nan, index=df.index)
+    for date in df['REF_DATE'].unique():
+        in_effect = rates[rates['EFFECTIVE_DATE'] <= date]
+        if len(in_effect):
+            minimum_wages[df['REF_DATE'] == date] = in_effect['MINIMUM_WAGE'].iloc[-1]
+    return minimum_wages.to_numpy()
+
+# Minimum wages in effect on the date of every row, with one sorted search and looped date by date, averaged over
+# the year of annual rows, and city living wages joined on annual rows crossed with the cities
+def benchmark_as_of(rows):
+    df = synthetic_wages_and_hours(rows)
+    rates = load_reference_rates()
+    start = time.perf_counter()
+    insert_rates_as_of(df, rates['minimum_wages'])
+    as_of_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    looped_minimum_wages(df, rates['minimum_wages'])
+    looped_seconds = time.perf_counter() - start
+    print(f'minimum wages as of each month ({rows:,} rows): as-of join {as_of_seconds:.3f}s, '
+          f'date by date {looped_seconds:.3f}s')
+
+    # Annual rows get the minimum wages of their year weighted by the days each was in effect
+    annual = df[['REF_DATE']].assign(REF_DATE=df['REF_DATE'].dt.to_period('Y').dt.start_time)
+    start = time.perf_counter()
+    insert_rates_as_of(annual, rates['minimum_wages'], period=wages_hours.reference_period)
+    annual_seconds = time.perf_counter() - start
+    print(f'minimum wages averaged over each year ({rows:,} rows): as-of join {annual_seconds:.3f}s')
+
+    # Annual rows crossed with the cities get the living wage each city published for their year, or none
+    city_living_wages = effective_from_year(rates['living_wages'])[['EFFECTIVE_DATE', 'END_DATE', 'CITY', 'PROVINCE',
+                                                                   'LIVING_WAGE']]
+    cities = city_living_wages[['CITY', 'PROVINCE']].drop_duplicates()
+    crossed = annual.head(rows // len(cities))[['REF_DATE']].merge(cities, how='cross')
+    start = time.perf_counter()
+    insert_rates_as_of(crossed, city_living_wages, by=['CITY', 'PROVINCE'], until='END_DATE',
+                       period=wages_hours.reference_period)
+    city_seconds = time.perf_counter() - start
+    print(f'city living wages of each year ({len(crossed):,} rows): as-of join {city_seconds:.3f}s')
+
+# Load the saved wage report page, repeating its table rows to get the given number of rows
+def scaled_wage_report(rows):
+    with open(wage_report_fixture, 'rb') as file:
+        page = file.read()
+    head, rest = page.rsplit(b'<tbody>', 1)
+    body, tail = rest.split(b'</tbody>', 1)
+    body_rows = body.split(b'</tr>')[:-1]
+    body_rows = [body_rows[row % len(body_rows)] for row in range(rows)]
+    return head + b'<tbody>' + b'</tr>'.join(body_rows) + b'</tr>' + b'</tbody>' + tail
+
+# Time a loader, returning seconds and the memory used by the loaded frame
+def time_load(function, *args, **kwargs):
+    start = time.perf_counter()
+    df = function(*args, **kwargs)
+    return time.perf_counter() - start, df.memory_usage(deep=True).sum(), len(df)
+
+def benchmark_formats(rows):
+    df = synthetic_wages_and_hours(rows)
+    clean_sector_names(df, NAICS)
+    df['YEAR'] = df['REF_DATE'].dt.year
+    with tempfile.TemporaryDirectory() as folder:
+        csv_path = os.path.join(folder, 'wages.csv')
+        parquet_path = os.path.join(folder, 'wages.parquet')
+        df.to_csv(csv_path, index=False, encoding='utf-8')
+        write_parquet_dataset(df, parquet_path, ['YEAR', NAICS])
+
+        loads = {
+            'csv': time_load(pd.read_csv, csv_path, parse_dates=['REF_DATE']),
+            'parquet': time_load(pd.read_parquet, parquet_path),
+            'csv, one sector and 2020+': time_load(lambda: (lambda d: d[(d[NAICS] == 'Construction ') & (d['YEAR'] >= 2020)])(pd.read_csv(csv_path, parse_dates=['REF_DATE']))),
+            'parquet, one sector and 2020+': time_load(pd.read_parquet, parquet_path, filters=[(NAICS, '==', 'Construction'), ('YEAR', '>=', 2020)]),
+        }
+    for name, (seconds, memory, loaded_rows) in loads.items():
+        print(f'load {name} ({rows:,} rows): {seconds:.3f}s, {memory / 2**20:.1f} MiB in memory, {loaded_rows:,} rows loaded')
+
+# Rewriting a CSV in full against writing it only when it changed: with the same rows in another order,
+# and with a new month added and some values revised
+def benchmark_csv_changes(rows):
+    keys = ['REF_DATE', 'GEO', 'Type of work', NAICS, 'Sex', 'Age group']
+    df = synthetic_wages_and_hours(rows).drop_duplicates(keys, ignore_index=True)
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'wages.csv')
+        start = time.perf_counter()
+        df.to_csv(path, index=False, encoding='utf-8')
+        print(f'full rewrite ({len(df):,} rows): {time.perf_counter() - start:.3f}s')
+
+        newest = df['REF_DATE'].max()
+        month = df[df['REF_DATE'] == newest].assign(REF_DATE=newest + pd.DateOffset(months=1))
+        revised = df.sample(frac=0.001, random_state=0).index
+        updates = {'same rows': df,
+                   'same rows in another order': df.sample(frac=1, random_state=0),
+                   'new month and revisions': pd.concat([df.assign(**{'Hourly Wage': df['Hourly Wage'].where(
+                       ~df.index.isin(revised), df['Hourly Wage'] + 1)}), month], ignore_index=True)}
+        for name, updated in updates.items():
+            start = time.perf_counter()
+            changes = write_csv_if_changed(updated, path, keys, os.path.join(folder, 'wages.delta.csv'))
+            print(f'write if changed, {name}: {time.perf_counter() - start:.3f}s, {changes}')
+
+# Archive hourly scrapes of the wage report where a few occupations change each day, comparing the archive's
+# size with keeping a copy of every scrape, and time the lookups of one occupation over the last year
+def benchmark_history(scrapes):
+    with open(wage_report_fixture, 'rb') as file:
+        page = build_occupations(file.read())
+    # 500 occupations, the fixture's repeated under made up NOCs
+    df = pd.concat([page.assign(NOC=page['NOC'] + f'{copy:02d}') for copy in range(50)], ignore_index=True)
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'history.csv')
+        copies = 0
+        start = time.perf_counter()
+        for scrape in range(scrapes):
+            if scrape % 24 == 0:
+                rows = rng.choice(len(df), 5, replace=False)
+                df.loc[df.index[rows], 'Median Wage'] = (df['Median Wage'].iloc[rows] * 1.02).round(2)
+            archive_snapshot(df, path, pd.Timestamp('2024-01-01', tz='UTC') + pd.Timedelta(hours=scrape))
+            copies += len(df.to_csv(index=False, encoding='utf-8').encode('utf-8'))
+        seconds = time.perf_counter() - start
+        print(f'archived {scrapes:,} scrapes of {len(df)} occupations in {seconds:.2f}s: '
+              f'{os.path.getsize(path) / 1024:.0f} KiB against {copies / 1024:.0f} KiB for a copy of each')
+
+        history = OccupationHistory(path)
+        nocs = df['NOC'].sample(100, random_state=0).tolist()
+        end = pd.Timestamp('2024-01-01', tz='UTC') + pd.Timedelta(hours=scrapes)
+        start = time.perf_counter()
+        for noc in nocs:
+            history.noc_history(noc, end - pd.Timedelta(days=365), end)
+        noc_seconds = (time.perf_counter() - start) / len(nocs)
+        start = time.perf_counter()
+        history.as_of(end - pd.Timedelta(days=30))
+        print(f'wage history of one occupation over a year: {noc_seconds * 1000:.3f}ms, '
+              f'every occupation as of a date: {(time.perf_counter() - start) * 1000:.3f}ms')
+
+# The per sector CSV loop the script had commented out, filtering the whole frame for every sector
+def legacy_export_sectors(df, folder):
+    for NAIC in df[NAICS].unique():
+        df[df[NAICS] == NAIC].to_csv(os.path.join(folder, NAIC + '.csv'), index=False, encoding='utf-8')
+
+# Split a frame into a CSV per sector with the legacy loop and by grouping once and writing from worker pools
+def benchmark_export(rows):
+    df = synthetic_wages_and_hours(rows)
+    clean_sector_names(df, NAICS)
+    df = pd.read_csv(io.StringIO(df.to_csv(index=False)), dtype=str, keep_default_na=False)
+    with tempfile.TemporaryDirectory() as folder:
+        start = time.perf_counter()
+        legacy_export_sectors(df, os.path.join(folder))
+        print(f'export {df[NAICS].nunique()} sectors ({rows:,} rows): legacy loop {time.perf_counter() - start:.3f}s')
+        for workers in sorted({1, os.cpu_count() or 1}):
+            for compress in [False, True]:
+                start = time.perf_counter()
+                export_partitions(df, NAICS, os.path.join(folder, f'{workers}-{compress}'), compress, workers)
+                print(f'export {df[NAICS].nunique()} sectors ({rows:,} rows): grouped once, {workers} workers'
+                      f'{", compressed" if compress else ""} {time.perf_counter() - start:.3f}s')
+
+# Build a table shaped like the scraped Job Bank wage report with the given number of rows
+def synthetic_wage_table(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    titles = np.array(['Legislators', 'Financial managers', 'Software developers and programmers',
+                       'Registered nurses and registered psychiatric nurses', 'Carpenters', 'Cooks'])
+    wages = rng.uniform(15, 150, (rows, 3)).round(2)
+    # Yearly wages are shown with thousands separators and some wages are not available
+    wage_text = np.array([[f'{wage * 1000:,.0f}' if wage > 100 else f'{wage:.2f}' for wage in row] for row in wages], dtype=object)
+    wage_text[rng.random((rows, 3)) < 0.05] = 'N/A'
+    return pd.DataFrame({
+        'Occupation': [f'{title}\n\t\t\t  \t\t\t\t\t   \n({code:05d})' for title, code in
+                       zip(rng.choice(titles, rows), rng.integers(0, 100000, rows))],
+        'Low Wage': wage_text[:, 0],
+        'Median Wage': wage_text[:, 1],
+        'High Wage': wage_text[:, 2],
+        'Source': [f'#note_{row % 5}_{row // 5}' for row in range(rows)],
+    })
+
+# The row by row wage table cleanup the script used before, kept to compare against
+def legacy_clean_wage_table(df):
+    def clean_text(text):
+        cleaned_text = re.sub(r'\s+', ' ', text.strip())
+        match = re.match(r'^(.*?)\s*\((\d+)\)$', cleaned_text)
+        if match:
+            return match.group(1), match.group(2)
+        return None, None
+
+    df['Occupation Title'] = pd.Series()
+    df['NOC'] = pd.Series()
+    for row in df.index:
+        df.loc[row, 'Occupation Title'], df.loc[row, 'NOC'] = clean_text(df.loc[row, 'Occupation'])
+    for column in ['Low Wage', 'Median Wage', 'High Wage']:
+        for row in range(len(df[column])):
+            df.loc[row, column] = df.loc[row, column].replace(',', '')
+        df[column] = [None if x == 'N/A' else x for x in df[column]]
+        df[column] = df[column].astype('float')
+
+def benchmark_clean_wage_table(rows, legacy_rows=5000):
+    df = synthetic_wage_table(rows)
+    new_time, new_df = time_stage(clean_wage_table, df)
+    # The legacy loop is far too slow for the whole table, so it is only run on the first rows
+    legacy_rows = min(rows, legacy_rows)
+    legacy_time, legacy_df = time_stage(legacy_clean_wage_table, df.head(legacy_rows))
+    print(f'clean_wage_table: vectorized {new_time:.3f}s for {rows:,} rows '
+          f'({new_time / rows * 1000000:.1f}s per million), legacy {legacy_time:.3f}s for {legacy_rows:,} rows '
+          f'({legacy_time / legacy_rows * 1000000:.1f}s per million)')
+
+def benchmark_extract_wage_table(rows):
+    page = scaled_wage_report(rows)
+    times = {}
+    for backend in ['bs4', 'lxml']:
+        start = time.perf_counter()
+        extract_wage_table(page, backend)
+        times[backend] = time.perf_counter() - start
+    print(f'extract_wage_table ({rows:,} rows): bs4 {times["bs4"]:.3f}s, lxml {times["lxml"]:.3f}s, '
+          f'{times["bs4"] / times["lxml"]:.1f}x faster')
+
+# Build a table with every combination of the dimension values, followed by the other StatsCan columns
+def lfs_table(dimensions, uom, rng):
+    index = pd.MultiIndex.from_product(list(dimensions.values()), names=list(dimensions))
+    df = index.to_frame(index=False)
+    df.insert(2, 'DGUID', '2016A000248')
+    df['UOM'] = uom(df)
+    df['UOM_ID'] = np.where(df['UOM'] == 'Persons', '249', '81')
+    df['SCALAR_FACTOR'] = 'units'
+    df['SCALAR_ID'] = '0'
+    df['VECTOR'] = 'v' + pd.Series(np.arange(len(df)) % 100000).astype(str)
+    df['COORDINATE'] = '1.1.1.1'
+    df['VALUE'] = rng.uniform(10, 2000, len(df)).round(2)
+    df['STATUS'] = ''
+    df['SYMBOL'] = ''
+    df['TERMINATED'] = ''
+    df['DECIMALS'] = '2'
+    return df
+
+# Build tables shaped like 14100064 (wages) and 14100037 (hours), with the columns the script drops and
+# filters on. Larger scales add age groups to the wages table, so Alberta's slice and the pivot grow with it,
+# and regions to the hours table, so only the national table grows.
+def synthetic_lfs_tables(scale, seed=0):
+    rng = np.random.default_rng(seed)
+    years = [str(year) for year in range(1997, 2025)]
+    geos = ['Canada', 'Alberta', 'Ontario']
+    wages = lfs_table({
+        'REF_DATE': years,
+        'GEO': geos,
+        'Wages': ['Total employees, all wages', 'Average hourly wage rate', 'Average weekly wage rate'],
+        'Type of work': ['Both full- and part-time employees', 'Full-time employees'],
+        NAICS: sectors,
+        'Sex': ['Both sexes', 'Males', 'Females'],
+        'Age group': ['15 years and over', '25 to 54 years'] + [f'Age group {number}' for number in range(2 * (scale - 1))],
+    }, lambda df: np.where(df['Wages'] == 'Total employees, all wages', 'Persons', 'Current dollars'), rng)
+    hours = lfs_table({
+        'REF_DATE': years,
+        'GEO': geos + [f'Region {number}' for number in range(3 * (scale - 1))],
+        'Actual hours worked': ['Average actual hours (worked in reference week, main job)', 'Number of employees'],
+        NAICS: [name.replace('Wholesale and retail trade ', 'Wholesale and retail trade\t\t ') for name in sectors],
+        'Sex': ['Both sexes', 'Males', 'Females'],
+    }, lambda df: np.where(df['Actual hours worked'] == 'Number of employees', 'Persons', 'Hours'), rng)
+    # Average hours have to fit in a week
+    hours['VALUE'] = np.where(hours['UOM'] == 'Hours', (hours['VALUE'] / 50).round(1), hours['VALUE'])
+    return wages, hours
+
+# Write a table as the zipped CSV StatsCan serves, with its byte order mark and quoted fields
+def write_table_zip(df, table_id, folder):
+    zip_path = os.path.join(folder, f'{table_id}-eng.zip')
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(f'{table_id}.csv', 'w') as file:
+            df.to_csv(file, index=False, encoding='utf-8-sig', quoting=1)
+    return zip_path
+
+# Time every stage of both pipelines at one scale, returning seconds and output rows by stage
+def time_pipeline(scale):
+    results = {}
+
+    def timed(name, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        rows = len(result) if isinstance(result, pd.DataFrame) else len(args[0])
+        results[name] = {'seconds': round(time.perf_counter() - start, 4), 'rows': rows}
+        return result
+
+    with tempfile.TemporaryDirectory() as folder:
+        wages, hours = synthetic_lfs_tables(scale)
+        wages_zip = write_table_zip(wages, wages_hours.table_id_wages, folder)
+        hours_zip = write_table_zip(hours, wages_hours.table_id_hours, folder)
+        del wages, hours
+
+        wages = timed('load wages', statcan.read_table_zip, wages_zip, wages_hours.table_id_wages,
+                      wages_hours.wages_filters, wages_hours.used_column, 200000, wages_hours.dimension_columns)
+        hours = timed('load hours', statcan.read_table_zip, hours_zip, wages_hours.table_id_hours,
+                      wages_hours.hours_filters, wages_hours.used_column, 200000, wages_hours.dimension_columns)
+        timed('validate wages table', validate_frame, wages, 'wages table')
+        timed('validate hours table', validate_frame, hours, 'hours table')
+        df = timed('pivot wages and hours', wages_hours.pivot_wages_and_hours, wages, hours)
+        timed('clean sector names', clean_sector_names, df, NAICS, 'NAICS_CODE')
+        timed('insert reference rates', wages_hours.insert_wages, df)
+        timed('validate wages and hours', validate_frame, df, 'wages and hours')
+        timed('write csv', write_csv_if_changed, df, os.path.join(folder, 'wages.csv'), wages_hours.wage_keys)
+        timed('write parquet', write_parquet_dataset, df, os.path.join(folder, 'wages.parquet'), ['YEAR', NAICS])
+        timed('rollup', lambda df: update_rollup(df)[0], df)
+
+    page = scaled_wage_report(500 * scale)
+    occupations = timed('extract wage table', extract_wage_table, page)
+    timed('clean wage table', clean_wage_table, occupations)
+    timed('map sectors', map_sectors, occupations)
+    # The repeated rows get made up NOCs, as more occupations would have
+    occupations['NOC'] = occupations['NOC'] + '-' + occupations.index.astype(str)
+    timed('validate occupations', validate_frame, occupations, 'occupations')
+    return results
+
+# Share of the pipeline spent validating its frames, which has to stay small as the tables grow
+def benchmark_validation(args):
+    for scale in args.scales:
+        stages = time_pipeline(scale)
+        validating = sum(result['seconds'] for name, result in stages.items() if name.startswith('validate'))
+        total = sum(result['seconds'] for result in stages.values())
+        rows = sum(result['rows'] for name, result in stages.items() if name.startswith('validate'))
+        print(f'{scale:>4}x validated {rows:,} rows in {validating:.3f}s of the pipeline\'s {total:.3f}s '
+              f'({validating / total:.1%})')
+
+# Construction in 2020 to 2023 from the whole pipeline filtered afterwards and from the lazy query,
+# which pushes the filters down into the reading of the tables, on synthetic tables read from their zips
+def benchmark_pushdown(args):
+    query = wages_hours.WagesAndHours().where(sector='Construction').years(2020, 2023)
+    for scale in args.scales:
+        with tempfile.TemporaryDirectory() as folder:
+            wages, hours = synthetic_lfs_tables(scale)
+            zips = {table_id: write_table_zip(table, table_id, folder)
+                    for table_id, table in [(wages_hours.table_id_wages, wages), (wages_hours.table_id_hours, hours)]}
+            del wages, hours
+
+            def run(filters, residual=()):
+                start = time.perf_counter()
+                tables = [statcan.read_table_zip(zips[table_id], table_id, filters(table_id), wages_hours.used_column,
+                                                 categories=wages_hours.dimension_columns)
+                          for table_id in [wages_hours.table_id_wages, wages_hours.table_id_hours]]
+                df = wages_hours.pivot_wages_and_hours(*tables)
+                clean_sector_names(df, NAICS, 'NAICS_CODE')
+                wages_hours.insert_wages(df)
+                return time.perf_counter() - start, df
+
+            full_seconds, full = run(lambda table_id: wages_hours.wages_filters if table_id == wages_hours.table_id_wages
+                                     else wages_hours.hours_filters)
+            start = time.perf_counter()
+            full[(full[NAICS] == 'Construction ') & full['YEAR'].between(2020, 2023)].reset_index(drop=True)
+            full_seconds += time.perf_counter() - start
+            pushed_seconds, pushed = run(query.table_filters)
+            print(f'{scale:>4}x Construction 2020-2023 ({len(pushed):,} of {len(full):,} rows): filtered afterwards '
+                  f'{full_seconds:.3f}s, pushed down {pushed_seconds:.3f}s')
+
+# The two outer merges the script used before the pivot, kept to compare against
+def legacy_merge_wages_and_hours(wages, hours):
+    hourly_wages = wages[wages['Wages'] == 'Average hourly wage rate']
+    weekly_wages = wages[wages['Wages'] == 'Average weekly wage rate']
+    wages = pd.merge(hourly_wages, weekly_wages, on = ['REF_DATE','GEO','Type of work',NAICS,'Sex', 'Age group'], how = 'outer')
+    wages.drop(columns=['Wages_x', 'Wages_y', 'UOM_y'], inplace=True)
+    wages.rename(columns={'UOM_x':'UOM_wages','VALUE_x':'Hourly Wage','VALUE_y':'Weekly Wage'}, inplace = True)
+
+    hours = hours.rename(columns={'UOM':'UOM_hours','VALUE':'Weekly Hours'})
+    map_labels(hours, NAICS, lambda label: label.replace('Wholesale and retail trade\t\t [41, 44-45]','Wholesale and retail trade [41, 44-45]'))
+    align_categories(wages, hours, ['GEO',NAICS,'Sex'])
+    return pd.merge(wages, hours, on = ['REF_DATE','GEO',NAICS,'Sex'], how = 'outer')
+
+# Pivot the whole national tables (every region and type of work) with some rows missing from each,
+# so keys found in only one table are covered, and time them against the merges
+def benchmark_pivot(args):
+    rng = np.random.default_rng(0)
+    wages_filters = {column: rows for column, rows in wages_hours.wages_filters.items() if column not in ['GEO', 'Type of work']}
+    hours_filters = {column: rows for column, rows in wages_hours.hours_filters.items() if column != 'GEO'}
+    for scale in args.scales:
+        with tempfile.TemporaryDirectory() as folder:
+            wages, hours = synthetic_lfs_tables(scale)
+            wages = wages[rng.random(len(wages)) > 0.05]
+            hours = hours[rng.random(len(hours)) > 0.05]
+            wages_zip = write_table_zip(wages, wages_hours.table_id_wages, folder)
+            hours_zip = write_table_zip(hours, wages_hours.table_id_hours, folder)
+            wages = statcan.read_table_zip(wages_zip, wages_hours.table_id_wages, wages_filters, wages_hours.used_column,
+                                           categories=wages_hours.dimension_columns)
+            hours = statcan.read_table_zip(hours_zip, wages_hours.table_id_hours, hours_filters, wages_hours.used_column,
+                                           categories=wages_hours.dimension_columns)
+
+        times = {}
+        for name, function in [('merges', legacy_merge_wages_and_hours), ('pivot', wages_hours.pivot_wages_and_hours)]:
+            start = time.perf_counter()
+            function(wages.copy(), hours.copy())
+            times[name] = time.perf_counter() - start
+        print(f'{scale:>4}x national wages and hours ({len(wages):,} + {len(hours):,} rows): merges {times["merges"]:.3f}s, '
+              f'pivot {times["pivot"]:.3f}s')
+
+def benchmark_pipeline(args):
+    results = {f'{scale}x': time_pipeline(scale) for scale in args.scales}
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+
+    # Stages that take less than min_seconds are too noisy to call a regression
+    regressions = []
+    for scale, stages in results.items():
+        for name, result in stages.items():
+            line = f'{scale:>5} {name:<24} {result["seconds"]:9.3f}s {result["rows"]:>10,} rows'
+            previous = baseline.get(scale, {}).get(name)
+            if previous:
+                ratio = result['seconds'] / previous['seconds'] if previous['seconds'] else float('inf')
+                line += f'   baseline {previous["seconds"]:.3f}s ({ratio:.2f}x)'
+                if previous['rows'] != result['rows']:
+                    line += f', rows changed from {previous["rows"]:,}'
+                    regressions.append(f'{name} at {scale}')
+                elif ratio > args.tolerance and result['seconds'] > args.min_seconds:
+                    line += ', SLOWER'
+                    regressions.append(f'{name} at {scale}')
+            print(line)
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+            file.write('\n')
+        print(f'Saved baseline to {args.baseline}')
+    elif regressions:
+        print(f'Regressions against the baseline: {", ".join(regressions)}')
+        sys.exit(1)
+
+# Memory of the whole national tables and of the merged frame, with labels as strings and as categoricals
+def benchmark_memory(args):
+    for scale in args.scales:
+        with tempfile.TemporaryDirectory() as folder:
+            wages, hours = synthetic_lfs_tables(scale)
+            zips = {'wages': (write_table_zip(wages, wages_hours.table_id_wages, folder), wages_hours.table_id_wages),
+                    'hours': (write_table_zip(hours, wages_hours.table_id_hours, folder), wages_hours.table_id_hours)}
+            del wages, hours
+            for name, (zip_path, table_id) in zips.items():
+                strings = statcan.read_table_zip(zip_path, table_id, {}, wages_hours.used_column)
+                start = time.perf_counter()
+                categorical = statcan.read_table_zip(zip_path, table_id, {}, wages_hours.used_column,
+                                                     categories=wages_hours.dimension_columns)
+                seconds = time.perf_counter() - start
+                print(f'{scale:>4}x national {name} table ({len(strings):,} rows): {memory_mb(strings):.1f} MiB as strings, '
+                      f'{memory_mb(categorical):.1f} MiB as categoricals, loaded in {seconds:.3f}s')
+
+            wages = statcan.read_table_zip(*zips['wages'], wages_hours.wages_filters, wages_hours.used_column,
+                                           categories=wages_hours.dimension_columns)
+            hours = statcan.read_table_zip(*zips['hours'], wages_hours.hours_filters, wages_hours.used_column,
+                                           categories=wages_hours.dimension_columns)
+            df = wages_hours.pivot_wages_and_hours(wages, hours)
+            clean_sector_names(df, NAICS, 'NAICS_CODE')
+            wages_hours.insert_wages(df)
+            strings = df.astype({column: object for column in df.columns if isinstance(df[column].dtype, pd.CategoricalDtype)})
+            print(f'{scale:>4}x merged frame ({len(df):,} rows): {memory_mb(strings):.1f} MiB as strings, '
+                  f'{memory_mb(df):.1f} MiB as categoricals')
+
+# Full and incremental rollups after the newest year changed,
+# and a dashboard view answered by grouping the merged frame and by looking it up in the rollup
+def benchmark_rollup(args):
+    for scale in args.scales:
+        with tempfile.TemporaryDirectory() as folder:
+            wages, hours = synthetic_lfs_tables(scale)
+            wages_zip = write_table_zip(wages, wages_hours.table_id_wages, folder)
+            hours_zip = write_table_zip(hours, wages_hours.table_id_hours, folder)
+            wages = statcan.read_table_zip(wages_zip, wages_hours.table_id_wages, wages_hours.wages_filters,
+                                           wages_hours.used_column, categories=wages_hours.dimension_columns)
+            hours = statcan.read_table_zip(hours_zip, wages_hours.table_id_hours, wages_hours.hours_filters,
+                                           wages_hours.used_column, categories=wages_hours.dimension_columns)
+            df = wages_hours.pivot_wages_and_hours(wages, hours)
+            clean_sector_names(df, NAICS, 'NAICS_CODE')
+            wages_hours.insert_wages(df)
+
+            # The previous rollup goes through its CSV like it does between two builds
+            path = os.path.join(folder, 'rollup.csv')
+            previous, fingerprints, _ = update_rollup(df)
+            previous.to_csv(path, index=False, encoding='utf-8')
+            previous = pd.read_csv(path, encoding='utf-8', float_precision='round_trip')
+
+            newest = df['YEAR'] == df['YEAR'].max()
+            df.loc[newest, 'Hourly Wage'] = df.loc[newest, 'Hourly Wage'] * 1.01
+            start = time.perf_counter()
+            full, _, _ = update_rollup(df)
+            full_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            _, _, years = update_rollup(df, previous, fingerprints)
+            incremental_seconds = time.perf_counter() - start
+            print(f'{scale:>4}x rollup ({len(df):,} rows into {len(full):,}): full {full_seconds:.3f}s, '
+                  f'incremental {incremental_seconds:.3f}s rolling up {years}')
+
+            # Construction by sex in 2020 and later for all age groups, the rollup indexed once like the server does
+            indexed = full.set_index([NAICS, 'Age group']).sort_index()
+            indexed.loc[('Construction ', ALL)]
+            start = time.perf_counter()
+            recent = df[(df['YEAR'] >= 2020) & (df[NAICS] == 'Construction ') & (df['Age group'] == '15 years and over')]
+            recent.groupby(['YEAR', 'Sex'], observed=True)['Hourly Wage'].mean()
+            group_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            looked_up = indexed.loc[('Construction ', ALL)]
+            looked_up = looked_up[(looked_up['YEAR'] >= 2020) & (looked_up['Sex'] != ALL)]
+            lookup_seconds = time.perf_counter() - start
+            print(f'{scale:>4}x Construction by sex since 2020: group-by {group_seconds * 1000:.2f}ms, '
+                  f'rollup lookup {lookup_seconds * 1000:.2f}ms')
+
+# Queries a dashboard would send to the server, some repeated so the cached answers are used too
+server_queries = [
+    '/wages?year=2020&sector=Construction&sex=Females',
+    '/wages?year_from=2015&year_to=2020&group_by=YEAR,Sex&measures=Hourly Wage,Weekly Hours',
+    '/wages?sector=Utilities&sector=Manufacturing&age_group=25 to 54 years&group_by=YEAR&agg=median',
+    '/wages?sector=Finance, insurance, real estate, rental and leasing&sex=Females&limit=20',
+    '/wages?group_by=North American Industry Classification System (NAICS)&measures=Hourly Wage&agg=max',
+    '/occupations?sector=Construction',
+    '/occupations?group_by=Sector&measures=Median Wage',
+] + [f'/wages?year={year}&sex=Males&limit=50' for year in range(2006, 2024)]
+
+# Load test of the query server on synthetic outputs: concurrent clients with their own keep-alive connection
+# send the queries while the wages CSV is rewritten and reloaded, and every request has to succeed
+def benchmark_server(args):
+    rows = args.rows or 200000
+    with tempfile.TemporaryDirectory() as folder:
+        def write_wages(seed):
+            df = synthetic_wages_and_hours(rows, seed)
+            clean_sector_names(df, NAICS, 'NAICS_CODE')
+            df['YEAR'] = df['REF_DATE'].dt.year
+            # Written next to the CSV and moved over it, so the server never sees it half written
+            path = os.path.join(folder, wages_hours.wages_and_hours_csv)
+            df.to_csv(path + '.tmp', index=False, encoding='utf-8')
+            os.replace(path + '.tmp', path)
+
+        write_wages(0)
+        occupations = synthetic_wage_table(5000)
+        clean_wage_table(occupations)
+        map_sectors(occupations)
+        occupations.to_csv(os.path.join(folder, occupations_output('ab', 'csv')), index=False, encoding='utf-8')
+
+        start = time.perf_counter()
+        query_server = server.start_server(folder, port=0, reload_interval=3600, settle_seconds=0, verbose=False)
+        print(f'server: loaded and indexed {rows:,} wage rows in {time.perf_counter() - start:.3f}s')
+        threading.Thread(target=query_server.serve_forever, daemon=True).start()
+        port = query_server.server_address[1]
+
+        def client(number):
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            latencies, failures = [], 0
+            for request in range(args.requests // args.concurrency):
+                path = server_queries[(number + request) % len(server_queries)].replace(' ', '%20')
+                sent = time.perf_counter()
+                connection.request('GET', path)
+                response = connection.getresponse()
+                response.read()
+                latencies.append(time.perf_counter() - sent)
+                failures += response.status != 200
+            connection.close()
+            return latencies, failures
+
+        # Rewrite the wages halfway through the run and reload them while the clients keep querying
+        def reload():
+            time.sleep(0.5)
+            write_wages(1)
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+            connection.request('POST', '/reload')
+            connection.getresponse().read()
+            connection.close()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency + 1) as executor:
+            reloaded = executor.submit(reload)
+            results = list(executor.map(client, range(args.concurrency)))
+            reloaded.result()
+        seconds = time.perf_counter() - start
+        query_server.store.stopped.set()
+        query_server.shutdown()
+        query_server.server_close()
+
+    latencies = np.concatenate([result[0] for result in results]) * 1000
+    failures = sum(result[1] for result in results)
+    print(f'server: {len(latencies):,} requests from {args.concurrency} clients in {seconds:.2f}s, '
+          f'{len(latencies) / seconds:,.0f} requests/s, latency p50 {np.percentile(latencies, 50):.1f}ms, '
+          f'p95 {np.percentile(latencies, 95):.1f}ms, p99 {np.percentile(latencies, 99):.1f}ms, '
+          f'{query_server.store.reloads} reloads, {failures} failed')
+    if failures:
+        sys.exit(1)
+
+# Each benchmark with its default number of rows, None for the ones that take the command line options
+benchmarks = {
+    'clean_sector_names': (benchmark_clean_sector_names, 2000000),
+    'formats': (benchmark_formats, 2000000),
+    'clean_wage_table': (benchmark_clean_wage_table, 100000),
+    'as_of': (benchmark_as_of, 500000),
+    'extract_wage_table': (benchmark_extract_wage_table, 20000),
+    'csv_changes': (benchmark_csv_changes, 200000),
+    'history': (benchmark_history, 500),
+    'export': (benchmark_export, 1000000),
+    'pipeline': (benchmark_pipeline, None),
+    'memory': (benchmark_memory, None),
+    'pivot': (benchmark_pivot, None),
+    'pushdown': (benchmark_pushdown, None),
+    'server': (benchmark_server, None),
+    'rollup': (benchmark_rollup, None),
+    'validation': (benchmark_validation, None),
+}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the wages and hours pipeline stages')
+    parser.add_argument('benchmarks', nargs='*', choices=[[]] + list(benchmarks), help='benchmarks to run, all by default')
+    parser.add_argument('--rows', type=int, help='rows in the synthetic frames, overriding the defaults')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10],
+                        help='scales of the synthetic tables for the pipeline, memory, pivot, pushdown, rollup and validation benchmarks, e.g. 1 10 100')
+    parser.add_argument('--baseline', default=baseline_file, help='baseline file to compare the pipeline stages with')
+    parser.add_argument('--save-baseline', action='store_true', help='store the pipeline stage times as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help='how many times slower than the baseline a stage can be before it counts as a regression')
+    parser.add_argument('--min-seconds', type=float, default=0.05,
+                        help='stages faster than this are never counted as regressions')
+    parser.add_argument('--requests', type=int, default=5000, help='requests sent in the server load test')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent clients in the server load test')
+    args = parser.parse_args()
+    for name in args.benchmarks or benchmarks:
+        function, rows = benchmarks[name]
+        if rows is None:
+            function(args)
+        else:
+            function(args.rows or rows)
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Store repeated labels (like GEO, sector or sex) as categoricals: one small integer code per row
+# and each label only once, instead of a Python string per row
+def to_categories(df, columns):
+    for column in columns:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+
+# Give the key columns of two frames the same categories, so merging on them compares the integer
+# codes instead of falling back to comparing strings. Unused categories are dropped on the way.
+def align_categories(left, right, columns):
+    for column in columns:
+        to_categories(left, [column])
+        to_categories(right, [column])
+        left[column] = left[column].cat.remove_unused_categories()
+        right[column] = right[column].cat.remove_unused_categories()
+        categories = union_categoricals([left[column], right[column]], sort_categories=True).categories
+        left[column] = left[column].cat.set_categories(categories)
+        right[column] = right[column].cat.set_categories(categories)
+
+# Cast numeric columns to the smallest type that holds every value exactly: integers to the smallest
+# integer type that fits, floats to float32 only when no value changes (so the CSVs are unaffected)
+def downcast_numbers(df, columns):
+    for column in columns:
+        values = df[column]
+        if pd.api.types.is_integer_dtype(values.dtype):
+            df[column] = pd.to_numeric(values, downcast='integer')
+        elif values.dtype == np.float64:
+            downcast = values.to_numpy().astype(np.float32)
+            if np.array_equal(downcast.astype(np.float64), values.to_numpy(), equal_nan=True):
+                df[column] = downcast
+
+# Memory used by a frame in MiB, counting the strings it holds
+def memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
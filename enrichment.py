@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+# Rates of an effective-dated table in effect on the date in column on of every row of keys, in the order of the
+# rows. A rate is in effect from its effective date until the next one of its group, or until its date in the
+# column until if given. Rows without a rate in effect get NaN.
+def rates_in_effect(keys, rates, on, effective, by, until):
+    rows = len(keys)
+    keys = keys.assign(**{on: keys[on].astype('datetime64[ns]')}, ROW=np.arange(rows))
+    keys = keys[keys[on].notna()].sort_values(on, kind='stable')
+    dates = {column: rates[column].astype('datetime64[ns]') for column in [effective, until] if column is not None}
+    rates = rates.astype({column: object for column in by}).assign(**dates).sort_values(effective, kind='stable')
+    joined = pd.merge_asof(keys, rates, left_on=on, right_on=effective, by=by or None, direction='backward')
+    if until is not None:
+        joined = joined[~(joined[on] >= joined[until])]
+    return joined.set_index('ROW').reindex(np.arange(rows))
+
+# Attach the columns of an effective-dated rate table (e.g. minimum wages by EFFECTIVE_DATE) to every row.
+# A rate is in effect from its effective date until the next one of its group, or until its date in the column
+# until if given, like a living wage published for a single year. With by, like ['CITY', 'PROVINCE'], each row
+# only gets the rates with the same values of those columns.
+# Without period every row gets the rates in effect on its date. With period, a pandas frequency like 'YS' for
+# annual rows, every row gets the average of the rates over the period starting on its date weighted by how long
+# each was in effect, e.g. three quarters of the old rate and one of the rate that took effect in October.
+# Rows get NaN when no rate is in effect on their date, or for part of their period.
+def insert_rates_as_of(df, rates, on='REF_DATE', effective='EFFECTIVE_DATE', by=(), until=None, period=None):
+    by = [by] if isinstance(by, str) else list(by)
+    if rates.duplicated(by + [effective]).any():
+        raise ValueError(f'Reference rates have more than one row per {by + [effective]}')
+    columns = [column for column in rates.columns if column not in by + [effective, until]]
+    keys = df[by + [on]].astype({column: object for column in by}).reset_index(drop=True)
+
+    if period is None:
+        joined = rates_in_effect(keys, rates, on, effective, by, until)
+        for column in columns:
+            df[column] = joined[column].to_numpy()
+        return
+
+    # The averages are computed on the rate table for the distinct periods of the rows, a few dozen years for annual
+    # rows however many rows there are, and mapped on the periods of the rows
+    rates = rates.astype({column: object for column in by}).sort_values(by + [effective], kind='stable', ignore_index=True)
+    periods = keys.drop_duplicates().dropna(subset=[on]).reset_index(drop=True)
+    if by:
+        groups = pd.concat([rates[by], periods[by]], ignore_index=True).groupby(by, sort=False, dropna=False).ngroup()
+        rate_groups, period_groups = groups.to_numpy()[:len(rates)], groups.to_numpy()[len(rates):]
+    else:
+        rate_groups, period_groups = np.zeros(len(rates), dtype=np.int64), np.zeros(len(periods), dtype=np.int64)
+
+    # A rate lasts until the next one of its group, or until its own end
+    starts = rates[effective].to_numpy(dtype='datetime64[ns]')
+    ends = np.full(len(rates), np.datetime64('NaT'), dtype=starts.dtype)
+    next_of_group = rate_groups[1:] == rate_groups[:-1]
+    ends[:-1][next_of_group] = starts[1:][next_of_group]
+    if until is not None:
+        ends = np.fmin(ends, rates[until].to_numpy(dtype='datetime64[ns]'))
+
+    # Each rate of the group of a period weighs the part of the period it was in effect, so a rate in effect for the
+    # whole period is taken as is. Periods with days without a rate in effect get none.
+    period_starts = periods[on].to_numpy(dtype='datetime64[ns]')[:, None]
+    period_ends = (pd.DatetimeIndex(periods[on]) + pd.tseries.frequencies.to_offset(period)).to_numpy(dtype='datetime64[ns]')[:, None]
+    overlaps = np.maximum(np.fmin(ends, period_ends) - np.maximum(starts, period_starts), np.timedelta64(0))
+    weights = np.where(rate_groups == period_groups[:, None], overlaps / (period_ends - period_starts), 0)
+    averages = pd.DataFrame(weights @ rates[columns].to_numpy(dtype=np.float64), columns=columns,
+                            index=pd.MultiIndex.from_frame(periods) if by else pd.Index(periods[on]))
+    averages = averages[np.isclose(weights.sum(axis=1), 1)]
+    periods_of_rows = pd.MultiIndex.from_frame(keys) if by else pd.Index(keys[on])
+    for column in columns:
+        df[column] = averages[column].reindex(periods_of_rows).to_numpy()
@@ -0,0 +1,68 @@
+import argparse
+import os
+import pandas as pd
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from occupations import occupations_output
+from wages_hours import living_wages_csv, wages_and_hours_csv
+
+# Splits of the output CSVs into one CSV per value of a column: the CSV that is split and the column
+splits = {
+    'sectors': (wages_and_hours_csv, 'North American Industry Classification System (NAICS)'),
+    'nocs': (occupations_output('ab', 'csv'), 'NOC'),
+    'cities': (living_wages_csv, 'CITY'),
+}
+
+# Characters that can't be in file names on some systems
+unsafe_characters_pattern = re.compile(r'[\\/:*?"<>|\s]+')
+
+# File name of the CSV of one value, e.g. 'Construction ' gives 'Construction.csv'
+def partition_file(value, compress=False):
+    name = unsafe_characters_pattern.sub(' ', value).strip() or 'missing'
+    return f'{name}.csv.gz' if compress else f'{name}.csv'
+
+# Write one partition, run in the worker processes
+def write_partition(task):
+    rows, path, compress = task
+    # Gzip stores no time stamp, so the same rows always give the same bytes
+    rows.to_csv(path, index=False, encoding='utf-8', compression={'method': 'gzip', 'mtime': 0} if compress else None)
+    return path
+
+# Write a CSV per value of a column into a folder, removing the CSVs of values that are gone.
+# The rows are grouped once and the partitions written from a pool of worker processes.
+# Values are kept as the text they were read as, so the partitions have the same formatting as the whole CSV.
+def export_partitions(df, column, folder, compress=False, workers=None):
+    os.makedirs(folder, exist_ok=True)
+    groups = df.groupby(column, sort=True).indices
+    files = {value: partition_file(value, compress) for value in groups}
+    clashing = pd.Series(list(files.values()))
+    if clashing.duplicated().any():
+        raise ValueError(f'Values of {column} give the same file names: {sorted(set(clashing[clashing.duplicated()]))}')
+
+    tasks = [(df.take(rows), os.path.join(folder, files[value]), compress) for value, rows in groups.items()]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        written = list(executor.map(write_partition, tasks, chunksize=max(len(tasks) // (4 * (workers or os.cpu_count() or 1)), 1)))
+
+    for name in os.listdir(folder):
+        if name.endswith(('.csv', '.csv.gz')) and name not in files.values():
+            os.remove(os.path.join(folder, name))
+    return written
+
+# Split one of the output CSVs into the Datasets folder, e.g. Datasets/sectors/Construction.csv
+def export_split(split, folder='Datasets', compress=False, workers=None):
+    path, column = splits[split]
+    df = pd.read_csv(path, dtype=str, keep_default_na=False, encoding='utf-8')
+    written = export_partitions(df, column, os.path.join(folder, split), compress, workers)
+    print(f'Exported {path} into {len(written)} CSVs by {column} in {os.path.join(folder, split)}')
+    return written
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Split the output CSVs into a CSV per sector, NOC or city')
+    parser.add_argument('splits', nargs='+', choices=list(splits))
+    parser.add_argument('--folder', default='Datasets', help='folder the splits are written into')
+    parser.add_argument('--compress', action='store_true', help='write gzip compressed CSVs')
+    parser.add_argument('--workers', type=int, help='worker processes, one per core by default')
+    args = parser.parse_args()
+    for split in args.splits:
+        export_split(split, args.folder, args.compress, args.workers)
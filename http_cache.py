@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import pickle
+import requests
+import threading
+import time
+
+# On-disk cache of HTTP responses and of the results parsed from them.
+# Cached URLs are requested again with If-None-Match/If-Modified-Since, and when the server answers
+# 304 Not Modified the parsed result is loaded from disk, so neither the download nor the parsing is redone.
+# The least recently used responses are evicted once the cache is bigger than max_bytes.
+class ResponseCache:
+    def __init__(self, folder='.http_cache', max_bytes=1024 ** 3):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.index_path = os.path.join(folder, 'index.json')
+        os.makedirs(folder, exist_ok=True)
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding='utf-8') as file:
+                self.index = json.load(file)
+        else:
+            self.index = {}
+
+    # Get the parsed result of a URL, parse is called with the path of the downloaded body.
+    # parse_key names the parsing, so different parsings of the same response are cached separately.
+    def get(self, url, parse, parse_key='default', session=requests, timeout=60):
+        with self.lock:
+            entry = self.index.get(url)
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        with session.get(url, headers=headers, timeout=timeout, stream=True) as response:
+            if response.status_code == 304 and entry:
+                return self.cached_result(url, entry, parse, parse_key)
+
+            response.raise_for_status()
+            with self.lock:
+                self.misses += 1
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            # Responses that can't be revalidated aren't worth keeping
+            if not etag and not last_modified:
+                body_path = self.file_path(url, 'uncached')
+            else:
+                body_path = self.file_path(url, 'body')
+            with open(body_path, 'wb') as file:
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    file.write(chunk)
+
+        result = parse(body_path)
+        if not etag and not last_modified:
+            os.remove(body_path)
+            return result
+
+        with self.lock:
+            self.remove_parsed(self.index.get(url))
+            self.index[url] = {'etag': etag, 'last_modified': last_modified, 'body': body_path, 'parsed': {}}
+            self.store_parsed(url, parse_key, result)
+        return result
+
+    # Load the cached parsed result, parsing the cached body if it was never parsed this way
+    def cached_result(self, url, entry, parse, parse_key):
+        with self.lock:
+            self.hits += 1
+            parsed_path = entry['parsed'].get(parse_key)
+        if parsed_path and os.path.exists(parsed_path):
+            with open(parsed_path, 'rb') as file:
+                result = pickle.load(file)
+            with self.lock:
+                entry['last_used'] = time.time()
+                self.save()
+            return result
+
+        result = parse(entry['body'])
+        with self.lock:
+            self.store_parsed(url, parse_key, result)
+        return result
+
+    # Name of a cache file for a URL
+    def file_path(self, url, kind):
+        name = hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.folder, f'{name}.{kind}')
+
+    # Save a parsed result next to its body, then evict old entries if the cache got too big
+    def store_parsed(self, url, parse_key, result):
+        entry = self.index[url]
+        parse_name = hashlib.sha256(parse_key.encode('utf-8')).hexdigest()[:16]
+        parsed_path = self.file_path(url, f'{parse_name}.pkl')
+        with open(parsed_path, 'wb') as file:
+            pickle.dump(result, file, protocol=pickle.HIGHEST_PROTOCOL)
+        entry['parsed'][parse_key] = parsed_path
+        entry['size'] = sum(os.path.getsize(path) for path in [entry['body']] + list(entry['parsed'].values()))
+        entry['last_used'] = time.time()
+        self.evict()
+        self.save()
+
+    def remove_parsed(self, entry):
+        if entry:
+            for path in entry['parsed'].values():
+                if os.path.exists(path):
+                    os.remove(path)
+
+    # Remove the least recently used entries until the cache fits in max_bytes
+    def evict(self):
+        total = sum(entry.get('size', 0) for entry in self.index.values())
+        for url in sorted(self.index, key=lambda url: self.index[url].get('last_used', 0)):
+            if total <= self.max_bytes:
+                break
+            entry = self.index.pop(url)
+            self.remove_parsed(entry)
+            if os.path.exists(entry['body']):
+                os.remove(entry['body'])
+            total -= entry.get('size', 0)
+
+    def save(self):
+        with open(self.index_path, 'w', encoding='utf-8') as file:
+            json.dump(self.index, file)
+
+    def report(self):
+        return f'HTTP cache {self.folder}: {self.hits} hits, {self.misses} misses'
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import re
+from functools import lru_cache
+
+# Patterns used on every label, compiled once. Whole columns are matched with the pattern strings instead,
+# so pandas compiles them once per column in its own regular expression engine
+square_brackets_pattern = re.compile(r'\[.*?\]')
+naics_code_pattern = re.compile(r'\[(.*?)\]')
+whitespace_pattern = re.compile(r'\s+')
+occupation_pattern = re.compile(r'^(.*?)\s*\((\d+)\)$')
+
+# Sector labels that Stats Canada publishes in more than one spelling, with the spelling the outputs use
+label_variants = {
+    'Wholesale and retail trade\t\t [41, 44-45]': 'Wholesale and retail trade [41, 44-45]',
+}
+
+# The label functions below are cached, since the same few hundred labels come back in every table and location
+@lru_cache(maxsize=65536)
+def normalize_label(label):
+    return label_variants.get(label, label)
+
+# Remove text within square brackets, like the NAICS codes at the end of sector names
+def remove_square_brackets(text):
+    return square_brackets_pattern.sub('', text)
+
+# Sector name without its NAICS codes, e.g. 'Construction [23]' gives 'Construction '
+@lru_cache(maxsize=65536)
+def sector_name(label):
+    return remove_square_brackets(normalize_label(label))
+
+# NAICS codes of a sector, e.g. 'Wholesale and retail trade [41, 44-45]' gives '41, 44-45', missing if there are none
+@lru_cache(maxsize=65536)
+def naics_code(label):
+    match = naics_code_pattern.search(normalize_label(label))
+    return match.group(1) if match else np.nan
+
+# Apply a function to every unique label of a column once and map the results back onto the column.
+# Only the given column is touched, missing labels stay missing and a categorical column stays categorical.
+def map_labels(df, column, function):
+    codes, labels = pd.factorize(df[column])
+    # The extra NaN at the end is picked by the code -1 that factorize gives missing values
+    mapped = np.array([function(label) for label in labels] + [np.nan], dtype=object)
+    if isinstance(df[column].dtype, pd.CategoricalDtype):
+        # Labels that map to the same result share one category
+        mapped_codes, categories = pd.factorize(mapped[:-1])
+        mapped_codes = np.append(mapped_codes, -1)
+        df[column] = pd.Categorical.from_codes(mapped_codes[codes], categories=categories)
+    else:
+        df[column] = mapped[codes]
+
+# Replace the known variants of the labels of a column with the spelling the outputs use
+def normalize_labels(df, column):
+    map_labels(df, column, normalize_label)
+
+# Remove the NAICS codes from the sector names.
+# With code_column the codes are kept in that column, inserted right after the sector names.
+def clean_sector_names(df, column, code_column=None):
+    if code_column is not None:
+        df.insert(df.columns.get_loc(column) + 1, code_column, df[column])
+        map_labels(df, code_column, naics_code)
+    map_labels(df, column, sector_name)
+
+# Split scraped occupations like 'Legislators\n\t (00010)' into title and NOC code columns, both missing if they don't match.
+# The patterns run over the unique occupations with one vectorized call each, which compiles them once per call.
+def split_occupations(df, column, title_column, code_column):
+    codes, occupations = pd.factorize(df[column])
+    # Remove excess whitespace, newlines, and tabs
+    occupations = pd.Series(occupations).str.strip().str.replace(whitespace_pattern.pattern, ' ', regex=True)
+    parts = occupations.str.extract(occupation_pattern.pattern)
+    df[title_column] = parts[0].array.take(codes, allow_fill=True)
+    df[code_column] = parts[1].array.take(codes, allow_fill=True)
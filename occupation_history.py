@@ -0,0 +1,114 @@
+import argparse
+import numpy as np
+import os
+import pandas as pd
+from datetime import datetime, timezone
+
+# Archive of every Job Bank scrape, so the wages of an occupation can be followed over time.
+# Only the occupations that changed since the scrape before are appended, each as a new version with the time
+# of the scrape, and occupations that left the wage report get a REMOVED version. The archive only grows with
+# the changes, not with the number of scrapes, and appending keeps the earlier lines untouched in git.
+# Source is left out: it anchors a row to its position in the page, which shifts whenever rows are added or removed.
+archived_columns = ['Occupation Title', 'Low Wage', 'Median Wage', 'High Wage', 'Sector', 'NAICS_CODE']
+version_columns = ['SCRAPED', 'NOC', 'CONTENT_HASH', 'REMOVED']
+
+# Name of the archive of a location, Alberta's has no location in its name like the other outputs
+def history_output(location):
+    if location == 'ab':
+        return 'Occupations_History.csv'
+    return f"Occupations_History_{location.replace('/', '_')}.csv"
+
+# Hash of the archived columns of every row, to find the occupations whose content changed
+def content_hashes(df):
+    hashes = pd.util.hash_pandas_object(df[archived_columns], index=False).to_numpy()
+    return pd.Series([f'{value:016x}' for value in hashes], index=df.index)
+
+# Every version in the archive in the order they were appended, or none if there is no archive yet
+def load_versions(path):
+    if os.path.exists(path):
+        versions = pd.read_csv(path, dtype={'NOC': str, 'NAICS_CODE': str, 'CONTENT_HASH': str}, encoding='utf-8')
+    else:
+        versions = pd.DataFrame(columns=version_columns + archived_columns)
+    versions['SCRAPED'] = pd.to_datetime(versions['SCRAPED'], utc=True)
+    versions['REMOVED'] = versions['REMOVED'].astype(bool)
+    return versions
+
+# Latest version of every occupation in the archive, including the ones that were removed
+def latest_versions(versions):
+    return versions.drop_duplicates('NOC', keep='last').set_index('NOC')
+
+# Append the occupations of a scrape that are new or changed since the last one, and a REMOVED version of the ones
+# that are gone. Rows without a NOC can't be followed from one scrape to the next and are left out.
+# Returns the number of added, changed and removed occupations.
+def archive_snapshot(df, path, scraped=None):
+    scraped = scraped or datetime.now(timezone.utc)
+    df = df[df['NOC'].notna()]
+    duplicated = df['NOC'][df['NOC'].duplicated()]
+    if len(duplicated):
+        raise ValueError(f'NOCs {sorted(set(duplicated))} appear more than once in the scrape archived to {path}')
+
+    current = df[['NOC'] + archived_columns].assign(CONTENT_HASH=content_hashes(df), REMOVED=False).set_index('NOC')
+    latest = latest_versions(load_versions(path))
+    present = latest[~latest['REMOVED']]
+    previous_hashes = present['CONTENT_HASH'].reindex(current.index)
+    added = previous_hashes.isna()
+    changed = ~added & (previous_hashes != current['CONTENT_HASH'])
+    gone = present.index.difference(current.index)
+
+    removed = pd.DataFrame({'CONTENT_HASH': '', 'REMOVED': True}, index=gone)
+    appended = pd.concat([current[(added | changed).to_numpy()], removed]).rename_axis('NOC').reset_index()
+    if len(appended):
+        appended.insert(0, 'SCRAPED', pd.Timestamp(scraped).isoformat(timespec='seconds'))
+        appended = appended[version_columns + archived_columns]
+        appended.to_csv(path, mode='a', header=not os.path.exists(path), index=False, encoding='utf-8')
+    return {'added': int(added.sum()), 'changed': int(changed.sum()), 'removed': len(gone)}
+
+# The archive of a location loaded for time travel: the versions are indexed by NOC and sorted by scrape time,
+# so the wages of an occupation over a period, or every occupation as of a date, are found by binary search
+class OccupationHistory:
+    def __init__(self, path):
+        self.path = path
+        self.versions = load_versions(path).sort_values(['NOC', 'SCRAPED'], kind='stable', ignore_index=True)
+        self.by_noc = self.versions.groupby('NOC', sort=False).indices
+        self.scraped = self.versions['SCRAPED'].dt.tz_convert(None).to_numpy()
+
+    # Dates without a time zone are taken as UTC, like the scrape times
+    def timestamp(self, date):
+        timestamp = pd.Timestamp(date)
+        return timestamp.tz_localize('UTC') if timestamp.tzinfo is None else timestamp.tz_convert('UTC')
+
+    # Versions of an occupation in effect during a period: the one in effect at its start and the ones after
+    def noc_history(self, noc, start=None, end=None):
+        rows = self.by_noc.get(noc)
+        if rows is None:
+            return self.versions.iloc[:0]
+        scraped = self.scraped[rows]
+        first = 0
+        if start is not None:
+            # The version scraped last before the start is still the one in effect at the start
+            first = max(np.searchsorted(scraped, self.timestamp(start).tz_convert(None).to_datetime64(), side='right') - 1, 0)
+        last = len(rows)
+        if end is not None:
+            last = np.searchsorted(scraped, self.timestamp(end).tz_convert(None).to_datetime64(), side='right')
+        return self.versions.iloc[rows[first:last]]
+
+    # Every occupation as it was on the wage report at a date
+    def as_of(self, date):
+        versions = self.versions[self.versions['SCRAPED'] <= self.timestamp(date)]
+        latest = versions.drop_duplicates('NOC', keep='last')
+        return latest[~latest['REMOVED']].reset_index(drop=True)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Look up the archived Job Bank wages of an occupation or a date')
+    parser.add_argument('--location', default='ab', help='wage report location of the archive')
+    parser.add_argument('--noc', help='NOC code of the occupation to show the wage history of')
+    parser.add_argument('--since', help='start of the history, e.g. 2024-01-01')
+    parser.add_argument('--until', help='end of the history')
+    parser.add_argument('--as-of', help='show every occupation as it was at this date')
+    args = parser.parse_args()
+
+    history = OccupationHistory(history_output(args.location))
+    if args.noc:
+        print(history.noc_history(args.noc, args.since, args.until)[['SCRAPED', 'REMOVED'] + archived_columns].to_string(index=False))
+    if args.as_of:
+        print(history.as_of(args.as_of)[['NOC'] + archived_columns].to_string(index=False))
@@ -0,0 +1,284 @@
+import hashlib
+import numpy as np
+import os
+import pandas as pd
+import requests
+import threading
+from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+from urllib3.util.retry import Retry
+
+from http_cache import ResponseCache
+from occupation_history import archive_snapshot, history_output
+from normalization import clean_sector_names, split_occupations
+from outputs import delta_output, describe_changes, write_csv_if_changed, write_parquet_dataset
+from profiling import stage
+from sector_lookup import TitleIndex, lookup_noc_sectors, noc_prefix_sectors, occupation_sectors_file, sector_mappings
+from validation import ValidationError, validate_stage
+
+# lxml is optional, without it the wage table is extracted with BeautifulSoup
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+# Job Bank website, can be pointed at a local server with JOBBANK_URL
+JOBBANK_URL = os.environ.get('JOBBANK_URL', 'https://www.jobbank.gc.ca')
+
+columns = ['Occupation', 'Low Wage', 'Median Wage', 'High Wage', 'Source']
+wage_columns = ['Low Wage', 'Median Wage', 'High Wage']
+
+# Raised for a downloaded page that can't be parsed, like a wage report without its table
+class PageError(ValueError):
+    pass
+
+# Address of the wage report for a location, a province like 'ab' or one of its economic regions
+def wage_report_url(location):
+    return f"{JOBBANK_URL.rstrip('/')}/wagereport/location/{location}"
+
+# Download and parse pages concurrently from a thread pool sharing one session, so connections are reused.
+# At most max_per_host requests run against the same host at a time, failed requests are retried
+# with exponential backoff and each request gives up after timeout seconds.
+# With a ResponseCache, unchanged pages are revalidated instead of downloaded and their parsed result is reused,
+# as long as it was parsed under the same parse_key (the name of parse by default).
+# Returns the parsed pages and the errors of the pages that could not be downloaded or parsed, both by URL,
+# so one bad page doesn't stop the others.
+def fetch_pages(urls, parse, cache=None, max_workers=8, max_per_host=4, retries=3, backoff=0.5, timeout=30,
+                parse_key=None):
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=['GET'])
+    adapter = HTTPAdapter(pool_maxsize=max_per_host, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    host_limits = {urlparse(url).netloc: threading.Semaphore(max_per_host) for url in urls}
+
+    def parse_page(url, content):
+        try:
+            return parse(content)
+        except Exception as error:
+            reason = error if isinstance(error, PageError) else repr(error)
+            raise PageError(f'{url} could not be parsed: {reason}') from error
+
+    def fetch(url):
+        with host_limits[urlparse(url).netloc]:
+            if cache is not None:
+                return cache.get(url, lambda path: read_and_parse(url, path), parse_key=parse_key or parse.__name__,
+                                 session=session, timeout=timeout)
+            response = session.get(url, timeout=timeout)
+            response.raise_for_status()
+        return parse_page(url, response.content)
+
+    def read_and_parse(url, path):
+        with open(path, 'rb') as file:
+            return parse_page(url, file.read())
+
+    pages = {}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fetch, url): url for url in urls}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                pages[url] = future.result()
+            except (requests.RequestException, PageError) as error:
+                errors[url] = error
+    session.close()
+    return pages, errors
+
+# Extract the rows of the first table body with BeautifulSoup by walking every row and cell
+def extract_rows_bs4(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    table = soup.find('tbody')
+    if table is None:
+        raise PageError('the page has no wage table')
+
+    data = []
+    for row in table.find_all('tr'):
+        cols = row.find_all('td')
+        occupation = cols[0].text.strip()
+        low_wage = cols[1].text.strip()
+        median_wage = cols[2].text.strip()
+        high_wage = cols[3].text.strip()
+        source = cols[4].find('a')['href']  # assuming the source is in a link
+        data.append([occupation, low_wage, median_wage, high_wage, source])
+    return data
+
+# Extract the same fields with lxml, which parses in C and only visits the rows and cells that are used
+def extract_rows_lxml(content):
+    tree = etree.fromstring(content, etree.HTMLParser())
+    table = tree.find('.//tbody') if tree is not None else None
+    if table is None:
+        raise PageError('the page has no wage table')
+
+    data = []
+    for row in table.iterchildren('tr'):
+        cols = row.findall('td')
+        texts = [''.join(col.itertext()).strip() for col in cols[:4]]
+        source = cols[4].find('.//a').get('href')
+        data.append(texts + [source])
+    return data
+
+extractors = {'lxml': extract_rows_lxml, 'bs4': extract_rows_bs4}
+
+# Extract the Job Bank wage report table into a dataframe, using lxml when it is installed
+def extract_wage_table(content, backend='lxml'):
+    if backend == 'lxml' and etree is None:
+        backend = 'bs4'
+    return pd.DataFrame(extractors[backend](content), columns=columns)
+
+# Clean the scraped Job Bank wage table one whole column at a time:
+# split 'Occupation' into 'Occupation Title' and 'NOC' and turn the wages into floats
+def clean_wage_table(df):
+    # Extract occupation and code, e.g. 'Legislators (00010)', rows that don't match are left empty
+    split_occupations(df, 'Occupation', 'Occupation Title', 'NOC')
+
+    # Remove thousands separators, treat N/A as missing and cast them as floats
+    wages = df[wage_columns].apply(lambda column: column.str.replace(',', '', regex=False))
+    df[wage_columns] = wages.replace('N/A', np.nan).astype('float')
+
+# Indexes of the sector mappings of reference_data/occupation_sectors.csv, built the first time occupations are mapped
+@lru_cache(maxsize=None)
+def sector_indexes():
+    noc_sectors, title_sectors = sector_mappings()
+    return noc_prefix_sectors(noc_sectors), TitleIndex(title_sectors)
+
+# Map Occupations to Industry Sectors by their NOC code, or the longest known prefix of it for new codes.
+# Occupations without a known code fall back on their title, first as is and then the closest known title.
+# Then move the NAICS codes out of the Sector names.
+def map_sectors(df):
+    noc_sectors, title_sectors = sector_mappings()
+    prefix_sectors, title_index = sector_indexes()
+    sectors, _ = lookup_noc_sectors(df['NOC'], noc_sectors, prefix_sectors)
+
+    missing = sectors.isna() & df['Occupation Title'].notna()
+    sectors[missing] = df.loc[missing, 'Occupation Title'].map(title_sectors)
+
+    # Only the unique titles left are matched against the title index
+    missing = sectors.isna() & df['Occupation Title'].notna()
+    if missing.any():
+        codes, titles = pd.factorize(df.loc[missing, 'Occupation Title'])
+        _, matched = title_index.match(titles)
+        sectors[missing] = matched[codes]
+
+    df['Sector'] = sectors
+    clean_sector_names(df, 'Sector', 'NAICS_CODE')
+
+# Occupations that couldn't be mapped to a sector, to be added to the mappings
+def unmatched_occupations(df):
+    unmatched = df[df['Sector'].isna()]
+    return unmatched['Occupation Title'].fillna(unmatched['Occupation'].str.strip()) + ' (' + unmatched['NOC'].fillna('no NOC') + ')'
+
+# Run the occupations pipeline on a downloaded wage report page
+def build_occupations(content):
+    df = extract_wage_table(content)
+
+    # Split the occupation title from its NOC code and cast the wages as floats
+    clean_wage_table(df)
+
+    map_sectors(df)
+    return df
+
+# Version of the frames build_occupations returns, to be raised whenever its columns or cleaning change
+occupations_format = 2
+
+# Key the parsed wage reports are cached under: a page that Job Bank didn't change is parsed again
+# when build_occupations or the sector mappings changed since it was cached
+@lru_cache(maxsize=None)
+def occupations_parse_key():
+    with open(occupation_sectors_file, 'rb') as file:
+        mappings = file.read()
+    return f'{build_occupations.__name__} v{occupations_format} {hashlib.sha256(mappings).hexdigest()[:16]}'
+
+# Name of the output files for a location, Alberta keeps the original names
+def occupations_output(location, extension):
+    if location == 'ab':
+        return f'Complete_Occupations.{extension}'
+    return f"Complete_Occupations_{location.replace('/', '_')}.{extension}"
+
+# Scrape and build the occupations datasets of every location with their own response cache.
+# The CSVs are only written when their rows changed, with the changed rows in delta_folder if given.
+# Locations that can't be downloaded, parsed or validated keep their previous outputs while the others are
+# written, then the pipeline fails naming them.
+def run_occupations(locations=('ab',), cache_folder=os.path.join('.http_cache', 'jobbank'), delta_folder=None):
+    cache = ResponseCache(cache_folder)
+
+    # Connect to Job Bank website and retrieve the HTML of every location concurrently,
+    # extracting and cleaning the wage tables and mapping occupations to industry sectors
+    urls = {location: wage_report_url(location) for location in locations}
+    with stage('scrape occupations') as record:
+        occupations, errors = fetch_pages(list(urls.values()), build_occupations, cache=cache,
+                                          parse_key=occupations_parse_key())
+        record['rows_out'] = sum(len(df) for df in occupations.values())
+
+    missing = []
+    invalid = []
+    for location, url in urls.items():
+        if url in errors:
+            print(f'Could not get the wage report for {location}: {errors[url]}')
+            missing.append(location)
+            continue
+
+        df = occupations[url]
+        unmatched = unmatched_occupations(df)
+        if len(unmatched):
+            print(f'{len(unmatched)} occupations of {location} have no sector: {", ".join(unmatched)}')
+
+        # A location that fails validation keeps its previous outputs, the others are still written
+        try:
+            validate_stage(df, 'occupations')
+        except ValidationError as error:
+            print(f'Not writing the occupations of {location}: {error}')
+            invalid.append(location)
+            continue
+
+        with stage(f'write occupations {location}', rows_in=len(df)) as record:
+            path = occupations_output(location, 'csv')
+            changes = write_csv_if_changed(df, path, ['NOC'], delta_output(delta_folder, path))
+            print(describe_changes(path, changes))
+
+            # Typed columnar copy partitioned by sector for faster loading
+            if changes['written'] or not os.path.exists(occupations_output(location, 'parquet')):
+                write_parquet_dataset(df, occupations_output(location, 'parquet'), ['Sector'])
+            record['rows_out'] = len(df)
+
+        # Keep the wages of every scrape, appending only the occupations that changed
+        with stage(f'archive occupations {location}', rows_in=len(df)) as record:
+            changes = archive_snapshot(df, history_output(location))
+            print(f'{history_output(location)}: {changes["added"]} occupations added, '
+                  f'{changes["changed"]} changed, {changes["removed"]} removed')
+            record['rows_out'] = sum(changes.values())
+    print(cache.report())
+    if missing:
+        raise RuntimeError(f'Could not get the wage reports of {", ".join(missing)}' +
+                           (f', and the occupations of {", ".join(invalid)} failed validation' if invalid else ''))
+    if invalid:
+        raise ValidationError(f'The occupations of {", ".join(invalid)} failed validation')
+
+# Download CSV into a folder
+# # Set filepath
+# # Get the current working directory (where your script is located)
+# current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# folder_name = 'Datasets'
+
+# # Create the full path of the output folder
+# sub_folder = os.path.join(current_dir, folder_name)
+
+# # Create a new directory if it doesn't exist
+# if not os.path.exists(sub_folder):
+#     os.makedirs(sub_folder)
+
+# # Define the filename for your CSV file
+# csv_filename = 'Complete_Occupations.csv'
+
+# # Combine the current directory path and the filename
+# # csv_path = os.path.join(current_dir, csv_filename)
+# csv_path = os.path.join(sub_folder, csv_filename)
+
+# # Save the DataFrame to CSV
+# df.to_csv(csv_path, index=False, encoding='utf-8')
+
+# # print(f"CSV file saved to: {csv_path}")
@@ -0,0 +1,112 @@
+import io
+import numpy as np
+import os
+import pandas as pd
+import shutil
+
+# Write a frame as a compressed Parquet dataset with one folder per value of the partition columns
+# (e.g. YEAR=2020/<sector>), so readers can load only the years or sectors they need with
+# pd.read_parquet(path, filters=[('YEAR', '>=', 2020)]) and get the column types back as written.
+# Labels are partitioned on without their surrounding spaces, e.g. sectors are in Construction, not 'Construction '.
+def write_parquet_dataset(df, path, partition_cols):
+    # Replace the previous dataset, otherwise new files would be added next to the old ones
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    df = df.assign(**{column: df[column].str.strip() for column in partition_cols
+                      if not pd.api.types.is_numeric_dtype(df[column])})
+    # Grouping the rows by partition first writes each partition as one row group instead of many small ones
+    df = df.sort_values(partition_cols, kind='stable')
+    # pyarrow refuses to write more than 1024 partitions unless told how many there are
+    partitions = len(df[partition_cols].drop_duplicates())
+    # Files are named by their number instead of a random id, so a partition whose rows didn't change is written
+    # again with the same name and bytes and doesn't show up as a change in git
+    df.to_parquet(path, engine='pyarrow', compression='zstd', partition_cols=partition_cols, index=False,
+                  max_partitions=max(partitions, 1024), basename_template='part-{i}.parquet')
+
+# Read CSV text with every value kept as the text it was written as
+def read_csv_text(text):
+    return pd.read_csv(io.StringIO(text), dtype=str, keep_default_na=False, encoding='utf-8')
+
+# Identify the rows by their key columns, numbering the repeats of a key so every row has its own
+def key_index(df, keys):
+    occurrence = df.groupby(keys, sort=False).cumcount().astype(str)
+    return pd.MultiIndex.from_frame(df[keys].assign(occurrence=occurrence))
+
+# Write a frame as CSV only when its content changed since the last write, so scheduled runs don't rewrite
+# and commit files that hold the same data. The new rows are compared with the file's rows by their keys:
+# rows that were already there keep their place and, when only their number formatting differs (15 and 15.0),
+# their text, new rows go after them and removed rows are dropped, so a new month only adds lines to the diff.
+# With delta_path the added, changed and removed rows are also written there, with a CHANGE column.
+# Returns the number of added, changed and removed rows and whether the file was written.
+def write_csv_if_changed(df, path, keys, delta_path=None):
+    text = df.to_csv(index=False)
+    previous_text = None
+    if os.path.exists(path):
+        with open(path, encoding='utf-8', newline='') as file:
+            previous_text = file.read()
+    if text == previous_text:
+        if delta_path and os.path.exists(delta_path):
+            os.remove(delta_path)
+        return {'added': 0, 'changed': 0, 'removed': 0, 'written': False}
+
+    new = read_csv_text(text)
+    if previous_text is None:
+        old = new.iloc[:0]
+    else:
+        old = read_csv_text(previous_text)
+
+    if list(old.columns) != list(new.columns):
+        # Nothing can be kept from a file with other columns
+        rows, added, changed, removed = new, new, new.iloc[:0], old
+    else:
+        old_keys = key_index(old, keys)
+        new_keys = key_index(new, keys)
+        positions = old_keys.get_indexer(new_keys)
+        kept = positions >= 0
+        previous = old.iloc[positions[kept]].reset_index(drop=True)
+        current = new[kept].reset_index(drop=True)
+        differs = np.zeros(len(current), dtype=bool)
+        for column in new.columns:
+            different = (previous[column] != current[column]).to_numpy(copy=True)
+            if different.any():
+                numbers = pd.to_numeric(previous[column][different], errors='coerce')
+                same_number = (numbers == pd.to_numeric(current[column][different], errors='coerce')).to_numpy()
+                same = np.flatnonzero(different)[same_number]
+                current.loc[same, column] = previous.loc[same, column]
+                different[same] = False
+                differs |= different
+
+        order = np.argsort(positions[kept], kind='stable')
+        added = new[~kept]
+        rows = pd.concat([current.iloc[order], added], ignore_index=True)
+        changed = current[differs]
+        removed = old[~old_keys.isin(new_keys)]
+
+    changes = {'added': len(added), 'changed': len(changed), 'removed': len(removed)}
+    text = rows.to_csv(index=False)
+    changes['written'] = text != previous_text
+    if changes['written']:
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            file.write(text)
+    if delta_path and os.path.exists(delta_path):
+        # A delta left from an earlier write would describe changes this one didn't make
+        os.remove(delta_path)
+    if delta_path and (len(added) or len(changed) or len(removed)):
+        delta = pd.concat([added.assign(CHANGE='added'), changed.assign(CHANGE='changed'),
+                           removed.assign(CHANGE='removed')], ignore_index=True)
+        delta[['CHANGE'] + [column for column in delta.columns if column != 'CHANGE']].to_csv(delta_path, index=False)
+    return changes
+
+# Path of the delta file of an output in a folder, or None when no deltas are written
+def delta_output(folder, path):
+    if folder is None:
+        return None
+    os.makedirs(folder, exist_ok=True)
+    name, _ = os.path.splitext(os.path.basename(path))
+    return os.path.join(folder, f'{name}.delta.csv')
+
+# Line describing what changed in an output
+def describe_changes(path, changes):
+    if not changes['written']:
+        return f'{path} unchanged'
+    return f'{path}: {changes["added"]} rows added, {changes["changed"]} changed, {changes["removed"]} removed'
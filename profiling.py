@@ -0,0 +1,130 @@
+import cProfile
+import json
+import os
+import re
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# resource only exists on Unix, peak RSS isn't reported elsewhere
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Profiling is opt-in through environment variables, so it reaches the pipelines' worker processes:
+# PIPELINE_PROFILE is a JSON lines file that gets one record per stage appended,
+# PIPELINE_PROFILE_STAGE names one stage to also dump cProfile stats and top tracemalloc allocations for
+PROFILE_ENV = 'PIPELINE_PROFILE'
+PROFILE_STAGE_ENV = 'PIPELINE_PROFILE_STAGE'
+
+# Characters that can't be in file names, e.g. the '/' of 'write occupations ab/<region>'
+unsafe_characters_pattern = re.compile(r'[\\/:*?"<>|]+')
+
+# Records of the stages running in this process, outermost first
+running_stages = []
+
+# Peak resident memory of this process so far in MiB
+def peak_rss_mb():
+    if resource is None:
+        return None
+    # Linux reports kilobytes, macOS bytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / 1024 ** 2 if os.uname().sysname == 'Darwin' else peak / 1024, 1)
+
+# Peak resident memory since it was last reset in MiB, only Linux keeps one that can be reset
+def resettable_peak_rss_mb():
+    try:
+        with open('/proc/self/status', encoding='utf-8') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+# Start a new peak from the current resident memory, returning whether it could be reset
+def reset_peak_rss():
+    try:
+        with open('/proc/self/clear_refs', 'w', encoding='utf-8') as file:
+            file.write('5')
+        return True
+    except OSError:
+        return False
+
+# Start measuring the peak memory of a stage. Resetting the peak would lose the peak of the stages it runs in,
+# so theirs is kept in their records first.
+def start_peak(record):
+    peak = resettable_peak_rss_mb()
+    for running in running_stages:
+        if running['peak_rss_mb'] is not None and peak is not None:
+            running['peak_rss_mb'] = max(running['peak_rss_mb'], peak)
+    if peak is not None and reset_peak_rss():
+        record['peak_rss_mb'] = resettable_peak_rss_mb()
+    else:
+        record['peak_rss_mb'] = None
+        record['process_peak_start_mb'] = peak_rss_mb()
+    running_stages.append(record)
+
+# Peak memory during a stage where it can be reset. Elsewhere only the peak of the whole process is known,
+# so how much the stage raised it is recorded instead, which is 0 when an earlier stage used more memory.
+def end_peak(record):
+    running_stages.remove(record)
+    if record['peak_rss_mb'] is not None:
+        record['peak_rss_mb'] = max(record['peak_rss_mb'], resettable_peak_rss_mb() or 0)
+    else:
+        start = record.pop('process_peak_start_mb')
+        record['peak_rss_growth_mb'] = None if start is None else round(peak_rss_mb() - start, 1)
+    # The stages this one ran in also saw its peak
+    for running in running_stages:
+        if running['peak_rss_mb'] is not None and record['peak_rss_mb'] is not None:
+            running['peak_rss_mb'] = max(running['peak_rss_mb'], record['peak_rss_mb'])
+
+# Name of the files a stage's detailed profile is dumped to, without the characters file names can't have
+def dump_name(name):
+    return unsafe_characters_pattern.sub('_', name)
+
+# Time a named pipeline stage, recording wall time, CPU time, peak RSS during the stage and rows in and out.
+# The stage sets record['rows_out'] itself when it knows it. Nothing is measured unless profiling is on.
+@contextmanager
+def stage(name, rows_in=None):
+    record = {'stage': name, 'rows_in': rows_in, 'rows_out': None}
+    path = os.environ.get(PROFILE_ENV)
+    if not path:
+        yield record
+        return
+
+    detailed = os.environ.get(PROFILE_STAGE_ENV) == name
+    if detailed:
+        profiler = cProfile.Profile()
+        tracemalloc.start()
+        profiler.enable()
+    start_peak(record)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    try:
+        yield record
+    except BaseException:
+        record['failed'] = True
+        raise
+    finally:
+        record['wall_s'] = round(time.perf_counter() - wall_start, 4)
+        record['cpu_s'] = round(time.process_time() - cpu_start, 4)
+        if detailed:
+            profiler.disable()
+            profiler.dump_stats(f'{dump_name(name)}.prof')
+            with open(f'{dump_name(name)}.tracemalloc.txt', 'w', encoding='utf-8') as file:
+                # Leave out the profiler's own allocations
+                snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, cProfile.__file__)])
+                for statistic in snapshot.statistics('lineno')[:25]:
+                    file.write(f'{statistic}\n')
+            tracemalloc.stop()
+        end_peak(record)
+        record['pid'] = os.getpid()
+        record['time'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+        # Each record is a single append, so the pipeline processes can share the file
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(record) + '\n')
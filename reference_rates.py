@@ -0,0 +1,108 @@
+import hashlib
+import os
+import pickle
+import pandas as pd
+from functools import lru_cache
+
+# Reference rates are kept as CSV files in the repository, so every change to them is versioned with the code.
+# New years or cities only need new rows: lines starting with # are comments, like the sources of the rates.
+reference_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reference_data')
+living_wages_file = 'living_wages.csv'
+minimum_wages_file = 'minimum_wages.csv'
+populations_file = 'city_populations.csv'
+
+# Columns and types of each file, the columns identifying a row, and the columns that have to be positive
+schemas = {
+    living_wages_file: {'YEAR': 'int64', 'CITY': str, 'PROVINCE': str, 'LIVING_WAGE': 'float64'},
+    minimum_wages_file: {'EFFECTIVE_DATE': 'datetime64[ns]', 'MINIMUM_WAGE': 'float64'},
+    populations_file: {'CITY': str, 'PROVINCE': str, 'POPULATION': 'int64'},
+}
+row_keys = {
+    living_wages_file: ['YEAR', 'CITY', 'PROVINCE'],
+    minimum_wages_file: ['EFFECTIVE_DATE'],
+    populations_file: ['CITY', 'PROVINCE'],
+}
+positive_columns = {
+    living_wages_file: ['LIVING_WAGE'],
+    minimum_wages_file: ['MINIMUM_WAGE'],
+    populations_file: ['POPULATION'],
+}
+
+# Read a reference file and check it against its schema, raising ValueError naming the file if it doesn't fit
+def read_reference_file(folder, name):
+    path = os.path.join(folder, name)
+    schema = schemas[name]
+    df = pd.read_csv(path, comment='#', encoding='utf-8')
+    missing = [column for column in schema if column not in df.columns]
+    if missing:
+        raise ValueError(f'{path} is missing the columns {missing}')
+    df = df[list(schema)]
+    if df.isna().any().any():
+        raise ValueError(f'{path} has empty values in {list(df.columns[df.isna().any()])}')
+    try:
+        df = df.astype(schema)
+    except (TypeError, ValueError) as error:
+        raise ValueError(f'{path} has values of the wrong type: {error}') from error
+    duplicated = df.duplicated(row_keys[name])
+    if duplicated.any():
+        raise ValueError(f'{path} has more than one row per {row_keys[name]}: {df[duplicated].to_dict("records")}')
+    for column in positive_columns[name]:
+        if (df[column] <= 0).any():
+            raise ValueError(f'{path} has {column} values that are not positive')
+    return df
+
+# Mean, median and population-weighted living wage of the cities of each year
+def living_wage_aggregates(living_wages, populations):
+    df = living_wages.merge(populations, on=['CITY', 'PROVINCE'], how='left', validate='many_to_one')
+    if df['POPULATION'].isna().any():
+        cities = df.loc[df['POPULATION'].isna(), 'CITY'].unique().tolist()
+        raise ValueError(f'{populations_file} has no population for the living wage cities {cities}')
+    df['WEIGHTED_WAGE'] = df['LIVING_WAGE'] * df['POPULATION']
+    years = df.groupby('YEAR')
+    return pd.DataFrame({
+        'LIVING_WAGE': years['LIVING_WAGE'].mean(),
+        'LIVING_WAGE_MEDIAN': years['LIVING_WAGE'].median(),
+        'LIVING_WAGE_WEIGHTED': years['WEIGHTED_WAGE'].sum() / years['POPULATION'].sum(),
+    }).reset_index()
+
+# Rates published for a year apply from its first day until the first day of the next year, so they can be joined
+# on dates like the minimum wages, and years without a published rate stay without one
+def effective_from_year(df):
+    df = df.copy()
+    df.insert(0, 'EFFECTIVE_DATE', pd.to_datetime(df['YEAR'].astype(str) + '-01-01'))
+    df.insert(1, 'END_DATE', pd.to_datetime((df['YEAR'] + 1).astype(str) + '-01-01'))
+    return df
+
+# Version of the dictionary load_reference_rates returns, to be raised whenever its tables or columns change
+rates_format = 4
+
+# Hash of the contents of the reference files and of the format of the rates, which identifies a cached version
+def reference_hash(folder):
+    digest = hashlib.sha256(f'rates v{rates_format}'.encode('utf-8'))
+    for name in schemas:
+        with open(os.path.join(folder, name), 'rb') as file:
+            digest.update(hashlib.sha256(file.read()).digest())
+    return digest.hexdigest()
+
+# Load the validated reference rates and the yearly living wage aggregates, once per process.
+# They are cached on disk under the hash of the reference files and rates_format, so they are only read,
+# validated and aggregated again when the files or the format change. Returns a dictionary with the living_wages of each city as published,
+# and the effective-dated tables to join on dates: the minimum_wages and the living_wage_aggregates of all the cities.
+@lru_cache(maxsize=None)
+def load_reference_rates(folder=reference_folder, cache_folder=os.path.join('.cache', 'reference_rates')):
+    cache_path = os.path.join(cache_folder, f'{reference_hash(folder)}.pkl')
+    if os.path.exists(cache_path):
+        with open(cache_path, 'rb') as file:
+            return pickle.load(file)
+
+    living_wages = read_reference_file(folder, living_wages_file)
+    rates = {
+        'living_wages': living_wages,
+        'minimum_wages': read_reference_file(folder, minimum_wages_file),
+        'living_wage_aggregates': effective_from_year(
+            living_wage_aggregates(living_wages, read_reference_file(folder, populations_file))),
+    }
+    os.makedirs(cache_folder, exist_ok=True)
+    with open(cache_path, 'wb') as file:
+        pickle.dump(rates, file, protocol=pickle.HIGHEST_PROTOCOL)
+    return rates
@@ -0,0 +1,110 @@
+import hashlib
+import itertools
+import json
+import numpy as np
+import os
+import pandas as pd
+
+from outputs import write_csv_if_changed
+
+NAICS = 'North American Industry Classification System (NAICS)'
+
+# Every year is broken down by each combination of the other dimensions, a dimension that is left out
+# being rolled up into 'All', so a dashboard view is one row of the rollup instead of a group-by
+rollup_dimensions = ['YEAR', NAICS, 'Sex', 'Age group']
+rollup_measures = ['Hourly Wage', 'Weekly Wage', 'Weekly Hours']
+ALL = 'All'
+
+# Stats Canada publishes a total for every dimension, which is what its 'All' rows hold. The values of a dimension
+# overlap, like 'Both sexes' with 'Males' and 'Females' or '15 years and over' with its age groups,
+# so aggregating over them would count the same employees more than once.
+dimension_totals = {NAICS: 'Total employees, all industries', 'Sex': 'Both sexes', 'Age group': '15 years and over'}
+
+# Sums and counts are kept next to the means so the rollup can be rolled up further exactly
+def measure_columns(measure):
+    return [measure, f'{measure} sum', f'{measure} count']
+
+# Version of the rows build_rollup returns, to be raised whenever how they are rolled up changes
+# (2: the 'All' rows are the totals of Stats Canada instead of sums over every value)
+rollup_format = 2
+
+# Fingerprint of the rows of every year and rollup_format, to find the years whose rows or rollup changed
+# since the last rollup
+def year_fingerprints(df):
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return {str(year): hashlib.sha256(f'rollup v{rollup_format}'.encode('utf-8') + hashes[rows].tobytes()).hexdigest()
+            for year, rows in df.groupby('YEAR').indices.items()}
+
+# Roll up the rows of the given years: the sum, count and mean of every measure for every grouping, the dimensions
+# left out taken from their total rows, with the year's mean minimum and living wage over its rows and the ratios
+# of the mean hourly wage to them
+def build_rollup(df):
+    others = rollup_dimensions[1:]
+    base = df[rollup_dimensions + rollup_measures].astype({dimension: object for dimension in others})
+    # Sector names are cleaned with a trailing space where their codes were
+    totals = {dimension: (base[dimension].str.strip() == total).to_numpy() for dimension, total in dimension_totals.items()}
+    groupings = []
+    for kept in itertools.chain.from_iterable(itertools.combinations(others, size) for size in range(len(others) + 1)):
+        rows = np.logical_and.reduce([totals[dimension] for dimension in others if dimension not in kept] +
+                                     [np.ones(len(base), dtype=bool)])
+        grouped = base[rows].groupby(['YEAR'] + list(kept), dropna=False, sort=False)[rollup_measures].agg(['sum', 'count'])
+        grouped.columns = [f'{measure} {statistic}' for measure, statistic in grouped.columns]
+        grouped = grouped.reset_index()
+        for dimension in others:
+            if dimension not in kept:
+                grouped[dimension] = ALL
+        groupings.append(grouped)
+    rollup = pd.concat(groupings, ignore_index=True)
+
+    for measure in rollup_measures:
+        rollup[measure] = rollup[f'{measure} sum'] / rollup[f'{measure} count'].where(rollup[f'{measure} count'] > 0)
+    rates = df.groupby('YEAR')[['MINIMUM_WAGE', 'LIVING_WAGE']].mean()
+    rollup = rollup.join(rates, on='YEAR')
+    rollup['HOURLY_TO_MINIMUM_WAGE'] = rollup['Hourly Wage'] / rollup['MINIMUM_WAGE']
+    rollup['HOURLY_TO_LIVING_WAGE'] = rollup['Hourly Wage'] / rollup['LIVING_WAGE']
+    columns = rollup_dimensions + [column for measure in rollup_measures for column in measure_columns(measure)]
+    rollup = rollup[columns + ['MINIMUM_WAGE', 'LIVING_WAGE', 'HOURLY_TO_MINIMUM_WAGE', 'HOURLY_TO_LIVING_WAGE']]
+    return rollup.sort_values(rollup_dimensions, kind='stable', na_position='last', key=sort_key, ignore_index=True)
+
+# Sort 'All' before the values of a dimension and the values by name
+def sort_key(column):
+    if column.name == 'YEAR':
+        return column
+    return column.where(column != ALL, '')
+
+# Load the rollup written by the last build and the fingerprints of the years it was built from,
+# or None and no fingerprints if there is none
+def load_rollup(path, fingerprints_path):
+    if not os.path.exists(path) or not os.path.exists(fingerprints_path):
+        return None, {}
+    with open(fingerprints_path, encoding='utf-8') as file:
+        fingerprints = json.load(file)
+    # Floats are read back exactly as written so kept years don't drift from a full rebuild
+    rollup = pd.read_csv(path, encoding='utf-8', float_precision='round_trip')
+    return rollup, fingerprints
+
+# Update a previous rollup with the rows of the years that changed since it was built (like the newest year
+# after a release), keeping the other years as they were. Returns the rollup, the fingerprints of its years
+# and the years that were rolled up again.
+def update_rollup(df, previous=None, fingerprints=None):
+    current = year_fingerprints(df)
+    if previous is None:
+        changed = list(current)
+    else:
+        changed = [year for year, fingerprint in current.items() if fingerprints.get(year) != fingerprint]
+        previous = previous[previous['YEAR'].astype(str).isin(set(current) - set(changed))]
+
+    rollup = build_rollup(df[df['YEAR'].astype(str).isin(changed)])
+    if previous is not None and len(previous):
+        # Both parts are sorted within each year already, so only the years have to be put in order
+        rollup = pd.concat([previous.astype(rollup.dtypes.to_dict()), rollup], ignore_index=True)
+        rollup = rollup.sort_values('YEAR', kind='stable', ignore_index=True)
+    return rollup, current, [int(year) for year in changed]
+
+# Write the rollup when it changed and the fingerprints of its years, returning the changed rows
+def write_rollup(rollup, fingerprints, path, fingerprints_path, delta_path=None):
+    changes = write_csv_if_changed(rollup, path, rollup_dimensions, delta_path)
+    with open(fingerprints_path, 'w', encoding='utf-8') as file:
+        json.dump(fingerprints, file, indent=2, sort_keys=True)
+        file.write('\n')
+    return changes
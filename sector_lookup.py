@@ -0,0 +1,99 @@
+import numpy as np
+import os
+import pandas as pd
+from functools import lru_cache
+
+from normalization import whitespace_pattern
+from reference_rates import reference_folder
+
+# NOC code, title and industry sector of every known occupation, one row per NOC code
+occupation_sectors_file = os.path.join(reference_folder, 'occupation_sectors.csv')
+occupation_sectors_columns = ['NOC', 'OCCUPATION_TITLE', 'SECTOR']
+
+# Read the occupation sectors once per process, raising ValueError naming the file if it doesn't fit.
+# Returns the sector of each NOC code and the sector of each title, both built from the same rows.
+@lru_cache(maxsize=None)
+def sector_mappings(path=occupation_sectors_file):
+    df = pd.read_csv(path, comment='#', dtype=str, keep_default_na=False, encoding='utf-8')
+    missing = [column for column in occupation_sectors_columns if column not in df.columns]
+    if missing:
+        raise ValueError(f'{path} is missing the columns {missing}')
+    empty = [column for column in occupation_sectors_columns if (df[column].str.strip() == '').any()]
+    if empty:
+        raise ValueError(f'{path} has empty values in {empty}')
+    for column in ['NOC', 'OCCUPATION_TITLE']:
+        duplicated = df[column].duplicated()
+        if duplicated.any():
+            raise ValueError(f'{path} has more than one row per {column}: {df.loc[duplicated, column].tolist()}')
+    return dict(zip(df['NOC'], df['SECTOR'])), dict(zip(df['OCCUPATION_TITLE'], df['SECTOR']))
+
+# Sectors of NOC code prefixes, for codes that aren't known themselves. NOC codes are hierarchical
+# (e.g. 7 trades, 72 industrial trades, 7231 machinists), so a prefix gets a sector when every known
+# code starting with it has that same sector. Longer prefixes come first since they are more specific.
+def noc_prefix_sectors(noc_sectors, lengths=(4, 3, 2, 1)):
+    prefixes = {}
+    for length in lengths:
+        sectors = {}
+        for code, sector in noc_sectors.items():
+            sectors.setdefault(code[:length], set()).add(sector)
+        prefixes[length] = {prefix: sectors.pop() for prefix, sectors in sectors.items() if len(sectors) == 1}
+    return prefixes
+
+# Look up the sector of every NOC code of a column, first by the whole code, then by its longest known prefix.
+# Returns the sectors and whether each one was found by a prefix, missing codes stay missing.
+def lookup_noc_sectors(nocs, noc_sectors, prefix_sectors):
+    sectors = nocs.map(noc_sectors)
+    by_prefix = pd.Series(False, index=nocs.index)
+    for length, prefixes in prefix_sectors.items():
+        missing = sectors.isna() & nocs.notna()
+        if not missing.any():
+            break
+        found = nocs[missing].str[:length].map(prefixes)
+        sectors[missing] = found
+        by_prefix[missing] = found.notna()
+    return sectors, by_prefix
+
+# Character trigrams of a title, ignoring case and spacing
+def trigrams(title):
+    title = ' ' + whitespace_pattern.sub(' ', title.strip().lower()) + ' '
+    return {title[position:position + 3] for position in range(len(title) - 2)}
+
+# Index of the trigrams of known titles, to find the closest known title of a reworded one.
+# Titles are scored by the share of trigrams they have in common (the Dice coefficient),
+# and a title only matches when its best score reaches min_score.
+class TitleIndex:
+    def __init__(self, mapping, min_score=0.7):
+        self.titles = np.array(list(mapping), dtype=object)
+        self.values = np.array(list(mapping.values()), dtype=object)
+        self.min_score = min_score
+        self.vocabulary = {}
+        postings = []
+        self.sizes = np.zeros(len(self.titles))
+        for number, title in enumerate(self.titles):
+            grams = trigrams(title)
+            self.sizes[number] = len(grams)
+            for gram in grams:
+                postings.append((self.vocabulary.setdefault(gram, len(self.vocabulary)), number))
+        # The titles of each trigram, stored one trigram after the other with the offset where each one starts
+        postings = np.array(postings, dtype=np.int64).reshape(-1, 2)
+        postings = postings[np.argsort(postings[:, 0], kind='stable')]
+        self.posting_titles = postings[:, 1]
+        self.offsets = np.searchsorted(postings[:, 0], np.arange(len(self.vocabulary) + 1))
+
+    # Best known title and its value for each title, both missing when nothing scores high enough
+    def match(self, titles):
+        matched_titles = np.full(len(titles), np.nan, dtype=object)
+        values = np.full(len(titles), np.nan, dtype=object)
+        for row, title in enumerate(titles):
+            grams = trigrams(title)
+            known = [self.vocabulary[gram] for gram in grams if gram in self.vocabulary]
+            if not known:
+                continue
+            shared = np.bincount(np.concatenate([self.posting_titles[self.offsets[gram]:self.offsets[gram + 1]] for gram in known]),
+                                 minlength=len(self.titles))
+            scores = 2 * shared / (self.sizes + len(grams))
+            best = scores.argmax()
+            if scores[best] >= self.min_score:
+                matched_titles[row] = self.titles[best]
+                values[row] = self.values[best]
+        return matched_titles, values
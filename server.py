@@ -0,0 +1,241 @@
+import argparse
+import json
+import numpy as np
+import os
+import pandas as pd
+import threading
+import time
+import traceback
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from occupations import occupations_output
+from wages_hours import rollup_csv, wages_and_hours_csv
+
+NAICS = 'North American Industry Classification System (NAICS)'
+
+# Datasets served, with their CSV and the column behind each query parameter that is indexed
+datasets = {
+    'wages': {'file': wages_and_hours_csv,
+              'indexes': {'year': 'YEAR', 'sector': NAICS, 'sex': 'Sex', 'age_group': 'Age group'}},
+    # Precomputed by year, sector, sex and age group, with 'All' rows for the subtotals
+    'rollup': {'file': rollup_csv,
+               'indexes': {'year': 'YEAR', 'sector': NAICS, 'sex': 'Sex', 'age_group': 'Age group'}},
+    'occupations': {'file': occupations_output('ab', 'csv'),
+                    'indexes': {'sector': 'Sector', 'noc': 'NOC'}},
+}
+
+# Aggregations a query can ask for
+aggregations = ['mean', 'median', 'min', 'max', 'sum', 'count']
+
+# Query parameters that aren't filters
+options = ['year_from', 'year_to', 'group_by', 'measures', 'agg', 'limit']
+
+# Options that list columns, separated by commas
+column_lists = ['group_by', 'measures']
+
+# Raised for queries that can't be answered, sent back as 400 Bad Request
+class QueryError(ValueError):
+    pass
+
+# One loaded version of a dataset with its indexes: the row positions of every value of the indexed columns.
+# A snapshot never changes after it is built, so requests can keep using it while a newer one replaces it.
+class Snapshot:
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.modified = os.path.getmtime(path)
+        self.df = pd.read_csv(path, dtype={'NOC': str, 'NAICS_CODE': str}, encoding='utf-8')
+        self.indexes = {}
+        for parameter, column in datasets[name]['indexes'].items():
+            # Sector names end with a space where their NAICS codes were, so labels are matched stripped
+            keys = self.df[column] if column == 'YEAR' else self.df[column].str.strip()
+            self.indexes[parameter] = {key: np.sort(rows) for key, rows in keys.groupby(keys).indices.items()}
+        self.loaded = time.time()
+        self.query = lru_cache(maxsize=1024)(self.run_query)
+
+    # Positions of the rows matching every indexed filter, or None when there are no filters
+    def matching_rows(self, filters):
+        rows = None
+        for parameter, keys in filters.items():
+            index = self.indexes[parameter]
+            found = [index[key] for key in keys if key in index]
+            positions = np.unique(np.concatenate(found)) if found else np.array([], dtype=np.int64)
+            rows = positions if rows is None else np.intersect1d(rows, positions, assume_unique=True)
+        return rows
+
+    # Answer a query given as (parameter, values) pairs, returning the JSON body
+    def run_query(self, query):
+        query = dict(query)
+        unknown = [parameter for parameter in query if parameter not in self.indexes and parameter not in options]
+        if unknown:
+            raise QueryError(f'Unknown parameters {unknown}, {self.name} can be filtered by {list(self.indexes)}')
+        filters = {parameter: values for parameter, values in query.items() if parameter in self.indexes}
+        try:
+            first = int(query['year_from'][0]) if 'year_from' in query else None
+            last = int(query['year_to'][0]) if 'year_to' in query else None
+            limit = int(query['limit'][0]) if 'limit' in query else None
+            years = [int(year) for year in filters.get('year', [])]
+        except ValueError as error:
+            raise QueryError(f'Years and limits have to be whole numbers: {error}') from error
+        if limit is not None and limit < 0:
+            raise QueryError(f'The limit has to be 0 or more, not {limit}')
+
+        if first is not None or last is not None:
+            if 'year' not in self.indexes:
+                raise QueryError(f'{self.name} has no years')
+            in_range = [year for year in self.indexes['year']
+                        if (first is None or year >= first) and (last is None or year <= last)]
+            years = [year for year in years if year in in_range] if 'year' in filters else in_range
+        if 'year' in filters or first is not None or last is not None:
+            filters['year'] = years
+        rows = self.matching_rows(filters)
+        df = self.df if rows is None else self.df.take(rows)
+
+        if 'group_by' in query:
+            group_by = list(query['group_by'])
+            agg = query.get('agg', ['mean'])[0]
+            if agg not in aggregations:
+                raise QueryError(f'Unknown aggregation {agg}, use one of {aggregations}')
+            measures = list(query.get('measures', df.select_dtypes('number').columns.difference(group_by)))
+            missing = [column for column in group_by + measures if column not in df.columns]
+            if missing:
+                raise QueryError(f'Unknown columns {missing}')
+            not_numbers = [column for column in measures if not pd.api.types.is_numeric_dtype(df[column])]
+            if not_numbers and agg != 'count':
+                raise QueryError(f'Measures {not_numbers} are not numbers, only count can aggregate them')
+            df = df.groupby(group_by, sort=True)[measures].agg(agg).reset_index()
+        if limit is not None:
+            df = df.head(limit)
+        return df.to_json(orient='records', date_format='iso').encode('utf-8')
+
+# Holds the current snapshot of every dataset and swaps in new ones when the CSVs change
+class DatasetStore:
+    def __init__(self, folder='.', settle_seconds=2):
+        self.folder = folder
+        self.settle_seconds = settle_seconds
+        # Datasets that haven't been built yet are loaded once their CSV shows up
+        self.snapshots = {name: Snapshot(name, self.path(name)) for name in datasets if os.path.exists(self.path(name))}
+        self.reloads = 0
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def path(self, name):
+        return os.path.join(self.folder, datasets[name]['file'])
+
+    # Load the datasets whose CSV changed. A CSV is only loaded once it hasn't changed for settle_seconds,
+    # so a refresh that is still writing it isn't read half way, and a CSV that can't be read is retried later.
+    def reload_changed(self):
+        with self.lock:
+            for name in datasets:
+                path = self.path(name)
+                snapshot = self.snapshots.get(name)
+                if snapshot is None and not os.path.exists(path):
+                    continue
+                try:
+                    modified = os.path.getmtime(path)
+                    if snapshot and modified == snapshot.modified or time.time() - modified < self.settle_seconds:
+                        continue
+                    # Replacing the reference is atomic, requests that already hold the old snapshot finish with it
+                    self.snapshots[name] = Snapshot(name, path)
+                    self.reloads += 1
+                    print(f'Reloaded {path}')
+                except Exception:
+                    print(f'Could not reload {path}, still serving the version loaded before:')
+                    traceback.print_exc()
+
+    def watch(self, interval=5):
+        while not self.stopped.wait(interval):
+            self.reload_changed()
+
+    def status(self):
+        return {name: {'rows': len(snapshot.df), 'file': snapshot.path,
+                       'modified': pd.Timestamp(snapshot.modified, unit='s').isoformat(),
+                       'loaded': pd.Timestamp(snapshot.loaded, unit='s').isoformat(),
+                       'indexes': list(snapshot.indexes)}
+                for name, snapshot in list(self.snapshots.items())}
+
+# Answers GET /<dataset>?<filters and options>, GET /status and POST /reload
+class QueryHandler(BaseHTTPRequestHandler):
+    # Keep-alive connections, and no Nagle delay between the headers and the body of small answers
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def send_body(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status, message):
+        self.send_body(status, json.dumps({'error': message}).encode('utf-8'))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        name = url.path.strip('/')
+        store = self.server.store
+        if name == 'status':
+            return self.send_body(200, json.dumps(store.status()).encode('utf-8'))
+        if name not in store.snapshots:
+            return self.send_error_json(404, f'Unknown dataset {name}, use one of {list(store.snapshots)}')
+
+        # Filters take several values as repeated parameters, e.g. ?year=2020&year=2021&sex=Females, since labels
+        # like 'Finance, insurance, real estate, rental and leasing' have commas. Only the column lists of
+        # group_by and measures are comma separated.
+        # Filter values are sorted so the same filters in another order hit the same cached answer.
+        query = []
+        for parameter, given in sorted(parse_qs(url.query).items()):
+            if parameter in column_lists:
+                given = [value for values in given for value in values.split(',')]
+            values = list(dict.fromkeys(value.strip() for value in given if value.strip()))
+            query.append((parameter, tuple(values if parameter in column_lists else sorted(values))))
+        try:
+            body = store.snapshots[name].query(tuple(query))
+        except QueryError as error:
+            return self.send_error_json(400, str(error))
+        except Exception as error:
+            # Answer anyway, a client shouldn't see its connection closed without a response
+            traceback.print_exc()
+            return self.send_error_json(500, f'Could not answer the query: {error!r}')
+        self.send_body(200, body)
+
+    def do_POST(self):
+        if urlparse(self.path).path.strip('/') != 'reload':
+            return self.send_error_json(404, 'Only /reload can be posted to')
+        self.server.store.reload_changed()
+        self.send_body(200, json.dumps(self.server.store.status()).encode('utf-8'))
+
+    # Requests are counted by the load test instead of being logged one by one
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+# Start serving the datasets in a folder, with a thread watching their CSVs for new versions
+def start_server(folder='.', host='127.0.0.1', port=8000, reload_interval=5, settle_seconds=2, verbose=True):
+    server = ThreadingHTTPServer((host, port), QueryHandler)
+    server.daemon_threads = True
+    server.verbose = verbose
+    server.store = DatasetStore(folder, settle_seconds)
+    threading.Thread(target=server.store.watch, args=(reload_interval,), daemon=True).start()
+    return server
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve the wages, hours and occupations datasets as a JSON query API')
+    parser.add_argument('--folder', default='.', help='folder with the CSVs built by Wages_and_hours_script.py')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--reload-interval', type=float, default=5, help='seconds between checks for new CSVs')
+    args = parser.parse_args()
+
+    server = start_server(args.folder, args.host, args.port, args.reload_interval)
+    print(f'Serving {", ".join(datasets)} on http://{args.host}:{args.port}, e.g. '
+          f'/wages?year_from=2020&sector=Construction&group_by=YEAR,Sex&measures=Hourly Wage')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.store.stopped.set()
+        server.server_close()
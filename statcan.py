@@ -0,0 +1,118 @@
+import csv
+import io
+import json
+import os
+import pandas as pd
+import requests
+import zipfile
+
+from compact import downcast_numbers, to_categories
+
+# Statistics Canada Web Data Service (WDS), can be pointed at a local server with STATCAN_WDS_URL
+WDS_URL = os.environ.get('STATCAN_WDS_URL', 'https://www150.statcan.gc.ca/t1/wds/rest/')
+
+# File recording the release of each table used for the last successful build
+RELEASES_FILE = 'statcan_releases.json'
+
+# Get the latest release date and reference period of each table from StatsCan
+def get_table_releases(table_ids):
+    body = [{'productId': int(table_id)} for table_id in table_ids]
+    response = requests.post(WDS_URL.rstrip('/') + '/getCubeMetadata', json=body, timeout=60)
+    response.raise_for_status()
+
+    releases = {}
+    for table_id, result in zip(table_ids, response.json()):
+        if result.get('status') != 'SUCCESS':
+            raise RuntimeError(f'Could not get metadata for table {table_id}: {result}')
+        metadata = result['object']
+        releases[table_id] = {'releaseTime': metadata.get('releaseTime'),
+                              'cubeEndDate': metadata.get('cubeEndDate')}
+    return releases
+
+# Load the releases recorded by the last build, or an empty dictionary if there was none
+def load_recorded_releases(path=RELEASES_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+# Record the releases that the output CSVs were built from
+def save_recorded_releases(releases, path=RELEASES_FILE):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(releases, file, indent=2, sort_keys=True)
+        file.write('\n')
+
+# A table has changed if its release differs from the recorded one (or none was recorded)
+def changed_tables(releases, recorded):
+    return [table_id for table_id, release in releases.items() if recorded.get(table_id) != release]
+
+# Get the address of the zipped CSV of a full table
+def table_download_url(table_id):
+    response = requests.get(WDS_URL.rstrip('/') + f'/getFullTableDownloadCSV/{table_id}/en', timeout=60)
+    response.raise_for_status()
+    result = response.json()
+    if result.get('status') != 'SUCCESS':
+        raise RuntimeError(f'Could not get download link for table {table_id}: {result}')
+    return result['object']
+
+# Download the zipped CSV of a full table, streaming it to disk instead of holding it in memory
+def download_table(table_id, path='.'):
+    zip_path = os.path.join(path, f'{table_id}-eng.zip')
+    with requests.get(table_download_url(table_id), stream=True, timeout=300) as response:
+        response.raise_for_status()
+        with open(zip_path, 'wb') as file:
+            for chunk in response.iter_content(chunk_size=1024 * 1024):
+                file.write(chunk)
+    return zip_path
+
+# Column names of the first line of a table's CSV
+def csv_header(file):
+    line = file.readline().decode('utf-8-sig')
+    return next(csv.reader(io.StringIO(line)))
+
+# Build a boolean mask for one filter, which can be a single value, a list of values or a function
+def filter_mask(column, condition):
+    if callable(condition):
+        return condition(column)
+    if isinstance(condition, (list, tuple, set)):
+        return column.isin(condition)
+    return column == condition
+
+# Read a downloaded table keeping only the needed columns and the rows matching every filter.
+# The CSV is read from the zip in chunks so memory scales with the kept rows, not the whole table.
+# The filtered columns have to be part of usecols (a list of columns or a function like in pd.read_csv).
+# The columns in categories are stored as categoricals and VALUE is downcast when that loses nothing.
+# check_header is called with the table's column names before any rows are read, to stop early on a changed layout.
+def read_table_zip(zip_path, table_id, filters, usecols=None, chunksize=200000, categories=(), check_header=None):
+    kept = []
+    with zipfile.ZipFile(zip_path) as archive:
+        if check_header is not None:
+            with archive.open(f'{table_id}.csv') as file:
+                check_header(csv_header(file))
+        with archive.open(f'{table_id}.csv') as file:
+            reader = pd.read_csv(file, usecols=usecols, dtype=str, encoding='utf-8-sig', chunksize=chunksize)
+            for chunk in reader:
+                mask = pd.Series(True, index=chunk.index)
+                for column, condition in filters.items():
+                    mask &= filter_mask(chunk[column], condition)
+                kept.append(chunk[mask])
+
+    df = pd.concat(kept, ignore_index=True)
+    df['REF_DATE'] = pd.to_datetime(df['REF_DATE'])
+    df['VALUE'] = df['VALUE'].astype('float')
+    to_categories(df, categories)
+    downcast_numbers(df, ['VALUE'])
+    return df
+
+# Download a table and load the filtered rows and columns.
+# With a ResponseCache the zip is only downloaded again when it changed on StatsCan's side, and the
+# filtered frame is reused as well. parse_key has to name the filters and columns, since they can't be compared.
+def load_table(table_id, filters, usecols=None, chunksize=200000, path='.', cache=None, parse_key=None, categories=(),
+               check_header=None):
+    if cache is None:
+        zip_path = download_table(table_id, path)
+        return read_table_zip(zip_path, table_id, filters, usecols, chunksize, categories, check_header)
+
+    return cache.get(table_download_url(table_id),
+                     lambda zip_path: read_table_zip(zip_path, table_id, filters, usecols, chunksize, categories, check_header),
+                     parse_key=parse_key or 'default', timeout=300)
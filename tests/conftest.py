@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# The pipeline modules are at the root of the repository
+root_folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root_folder)
+fixtures_folder = os.path.join(root_folder, 'fixtures')
+
+# Answers like Stats Canada's WDS and Job Bank: the table metadata and download links of the WDS, and files by path
+# with an ETag, so cached responses are revalidated with 304 Not Modified like the real ones
+class FakeHandler(BaseHTTPRequestHandler):
+    def send_body(self, status, body=b'', headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # getCubeMetadata, with the release of each table set on the server
+    def do_POST(self):
+        tables = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        results = [{'status': 'SUCCESS', 'object': {'productId': str(table['productId']), 'cubeEndDate': '2024-01-01',
+                                                    'releaseTime': self.server.releases[str(table['productId'])]}}
+                   for table in tables]
+        self.send_body(200, json.dumps(results).encode('utf-8'), [('Content-Type', 'application/json')])
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        if '/getFullTableDownloadCSV/' in self.path:
+            table_id = self.path.rstrip('/').split('/')[-2]
+            link = {'status': 'SUCCESS', 'object': f'{self.server.url}/zips/{table_id}-eng.zip'}
+            return self.send_body(200, json.dumps(link).encode('utf-8'), [('Content-Type', 'application/json')])
+
+        body = self.server.files.get(self.path)
+        if body is None:
+            return self.send_body(404)
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if self.headers.get('If-None-Match') == etag:
+            return self.send_body(304)
+        self.send_body(200, body, [('ETag', etag)])
+
+    def log_message(self, format, *args):
+        pass
+
+# Local server for the tests: files holds the body of every path and releases the release time of every table
+class FakeServer(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeHandler)
+        self.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server_address[1]}'
+        self.files = {}
+        self.releases = {}
+        self.requests = []
+
+@pytest.fixture
+def fake_server():
+    server = FakeServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+# Folder the pipelines are run in, their outputs and caches are written relative to it
+@pytest.fixture
+def build_folder(tmp_path, monkeypatch):
+    folder = tmp_path / 'build'
+    folder.mkdir()
+    monkeypatch.chdir(folder)
+    return folder
+
+# Synthetic tables of benchmark.py served by the fake server as Stats Canada's, all released at release
+release = '2024-01-05T08:30'
+
+@pytest.fixture
+def fake_statcan(fake_server, build_folder, tmp_path, monkeypatch):
+    import statcan
+    import wages_hours
+    from benchmark import synthetic_lfs_tables, write_table_zip
+
+    wages, hours = synthetic_lfs_tables(1)
+    for table_id, table in [(wages_hours.table_id_wages, wages), (wages_hours.table_id_hours, hours)]:
+        with open(write_table_zip(table, table_id, tmp_path), 'rb') as file:
+            fake_server.files[f'/zips/{table_id}-eng.zip'] = file.read()
+        fake_server.releases[table_id] = release
+    monkeypatch.setattr(statcan, 'WDS_URL', f'{fake_server.url}/t1/wds/rest/')
+    return fake_server
+
+# A region without a wage report is answered with a page that has no wage table
+no_table_page = b'<html><body><main><h1>Wage report</h1><p>No wages were found for this region.</p></main></body></html>'
+
+# The fixture page served by the fake server as Alberta's Job Bank wage report, and a region without one
+@pytest.fixture
+def fake_jobbank(fake_server, build_folder, monkeypatch):
+    import occupations
+
+    with open(os.path.join(fixtures_folder, 'wagereport_ab.html'), 'rb') as file:
+        fake_server.files['/wagereport/location/ab'] = file.read()
+    fake_server.files['/wagereport/location/ab/9999'] = no_table_page
+    monkeypatch.setattr(occupations, 'JOBBANK_URL', fake_server.url)
+    return fake_server
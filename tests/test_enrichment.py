@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import wages_hours
+from benchmark import looped_minimum_wages, synthetic_wages_and_hours
+from enrichment import insert_rates_as_of
+from reference_rates import effective_from_year, load_reference_rates
+
+@pytest.fixture
+def rates(build_folder):
+    return load_reference_rates()
+
+def test_rates_in_effect_on_each_date(rates):
+    df = pd.DataFrame({'REF_DATE': pd.to_datetime(['2005-08-01', '2018-09-01', '2018-10-01'])})
+    insert_rates_as_of(df, rates['minimum_wages'])
+    np.testing.assert_array_equal(df['MINIMUM_WAGE'], [np.nan, 13.6, 15.0])
+
+def test_as_of_join_matches_the_date_loop(rates):
+    df = synthetic_wages_and_hours(5000)
+    insert_rates_as_of(df, rates['minimum_wages'])
+    np.testing.assert_array_equal(df['MINIMUM_WAGE'], looped_minimum_wages(df, rates['minimum_wages']))
+
+# Minimum wage of every year averaged over its days
+def daily_minimum_wages(years, rates):
+    return np.array([looped_minimum_wages(pd.DataFrame({'REF_DATE': pd.date_range(f'{year}-01-01', f'{year}-12-31')}), rates).mean()
+                     for year in years])
+
+def test_annual_rows_get_the_daily_average(rates):
+    years = np.arange(2004, 2026)
+    df = pd.DataFrame({'REF_DATE': pd.to_datetime([f'{year}-01-01' for year in years])})
+    insert_rates_as_of(df, rates['minimum_wages'], period=wages_hours.reference_period)
+    np.testing.assert_allclose(df['MINIMUM_WAGE'], daily_minimum_wages(years, rates['minimum_wages']))
+
+# 2005 is only partly covered by a minimum wage, October 2018 raised it to 15.00 and no living wages were published
+# before 2014 or for 2024
+def test_insert_wages(rates):
+    df = pd.DataFrame({'REF_DATE': pd.to_datetime(['2005-01-01', '2006-01-01', '2018-01-01', '2024-01-01'])})
+    wages_hours.insert_wages(df)
+    assert df['YEAR'].tolist() == [2005, 2006, 2018, 2024]
+    np.testing.assert_allclose(df['MINIMUM_WAGE'], [np.nan, 7.0, 13.95, 15.0], rtol=1e-6)
+    assert df['LIVING_WAGE'].isna().tolist() == [True, True, False, True]
+
+def test_rates_by_city(rates):
+    city_living_wages = effective_from_year(rates['living_wages'])
+    cities = city_living_wages[['CITY', 'PROVINCE']].drop_duplicates()
+    df = pd.DataFrame({'REF_DATE': pd.to_datetime([f'{year}-01-01' for year in range(2012, 2026)])}).merge(cities, how='cross')
+    insert_rates_as_of(df, city_living_wages[['EFFECTIVE_DATE', 'END_DATE', 'CITY', 'PROVINCE', 'LIVING_WAGE']],
+                       by=['CITY', 'PROVINCE'], until='END_DATE', period=wages_hours.reference_period)
+
+    published = df[['CITY', 'PROVINCE']].assign(YEAR=df['REF_DATE'].dt.year).merge(
+        rates['living_wages'], on=['YEAR', 'CITY', 'PROVINCE'], how='left')['LIVING_WAGE']
+    np.testing.assert_array_equal(df['LIVING_WAGE'], published)
+
+def test_duplicate_rates(rates):
+    minimum_wages = pd.concat([rates['minimum_wages'], rates['minimum_wages'].tail(1)])
+    with pytest.raises(ValueError, match='more than one row'):
+        insert_rates_as_of(pd.DataFrame({'REF_DATE': pd.to_datetime(['2020-01-01'])}), minimum_wages)
@@ -0,0 +1,19 @@
+import pandas as pd
+
+from benchmark import NAICS, legacy_clean_sector_names, synthetic_wages_and_hours
+from normalization import clean_sector_names, split_occupations
+
+def test_clean_sector_names_matches_the_legacy_loop():
+    df = synthetic_wages_and_hours(2000)
+    legacy = df.copy()
+    legacy_clean_sector_names(legacy)
+    clean_sector_names(df, NAICS)
+    assert legacy.equals(df)
+
+def test_split_occupations():
+    df = pd.DataFrame({'Occupation': ['Legislators\n\t (00010)', '  Retail and wholesale trade\t\tmanagers\n (60010)',
+                                      'No code', None]})
+    split_occupations(df, 'Occupation', 'Occupation Title', 'NOC')
+    assert df['Occupation Title'].tolist()[:2] == ['Legislators', 'Retail and wholesale trade managers']
+    assert df['NOC'].tolist()[:2] == ['00010', '60010']
+    assert df[['Occupation Title', 'NOC']].iloc[2:].isna().all().all()
@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from occupation_history import OccupationHistory, archive_snapshot
+
+def occupations(**wages):
+    return pd.DataFrame({
+        'Occupation': [f'{title} ({noc})' for noc, title in [('00010', 'Legislators'), ('72010', 'Contractors')]],
+        'Low Wage': [50.0, 25.0], 'Median Wage': [wages.get('median', 60.0), 35.0], 'High Wage': [90.0, 45.0],
+        'Source': ['#note_0', '#note_1'], 'Occupation Title': ['Legislators', 'Contractors'], 'NOC': ['00010', '72010'],
+        'Sector': ['Public administration [91]', 'Construction [23]'], 'NAICS_CODE': ['91', '23']})
+
+def test_only_changes_are_archived(tmp_path):
+    path = tmp_path / 'history.csv'
+    assert archive_snapshot(occupations(), path, '2024-01-01') == {'added': 2, 'changed': 0, 'removed': 0}
+    # Rows that only moved on the page get another Source and are not a change
+    assert archive_snapshot(occupations().assign(Source=['#note_5', '#note_6']), path, '2024-02-01') == \
+        {'added': 0, 'changed': 0, 'removed': 0}
+    assert archive_snapshot(occupations(median=62.0), path, '2024-03-01') == {'added': 0, 'changed': 1, 'removed': 0}
+    assert archive_snapshot(occupations(median=62.0).head(1), path, '2024-04-01') == {'added': 0, 'changed': 0, 'removed': 1}
+    assert archive_snapshot(occupations(median=62.0), path, '2024-05-01') == {'added': 1, 'changed': 0, 'removed': 0}
+    assert len(pd.read_csv(path)) == 5
+
+def test_repeated_nocs(tmp_path):
+    with pytest.raises(ValueError, match='00010'):
+        archive_snapshot(pd.concat([occupations(), occupations().head(1)]), tmp_path / 'history.csv')
+
+def test_time_travel(tmp_path):
+    path = tmp_path / 'history.csv'
+    archive_snapshot(occupations(), path, '2024-01-01')
+    archive_snapshot(occupations(median=62.0), path, '2024-03-01')
+    archive_snapshot(occupations(median=62.0).head(1), path, '2024-04-01')
+    history = OccupationHistory(path)
+
+    assert history.noc_history('00010')['Median Wage'].tolist() == [60.0, 62.0]
+    # The version in effect at the start of the period is part of its history
+    assert history.noc_history('00010', '2024-02-01')['Median Wage'].tolist() == [60.0, 62.0]
+    assert history.noc_history('00010', '2024-03-02')['Median Wage'].tolist() == [62.0]
+    assert history.noc_history('00010', None, '2024-02-01')['Median Wage'].tolist() == [60.0]
+    assert history.noc_history('99999').empty
+    assert history.noc_history('72010')['REMOVED'].tolist() == [False, True]
+
+    assert history.as_of('2023-12-31').empty
+    assert history.as_of('2024-02-15').set_index('NOC')['Median Wage'].to_dict() == {'00010': 60.0, '72010': 35.0}
+    assert history.as_of('2024-04-01')['NOC'].tolist() == ['00010']
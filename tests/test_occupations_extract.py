@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+import occupations
+from benchmark import legacy_clean_wage_table, synthetic_wage_table, wage_report_fixture
+from occupations import build_occupations, clean_wage_table, extract_wage_table
+from sector_lookup import sector_mappings
+
+@pytest.fixture
+def page():
+    with open(wage_report_fixture, 'rb') as file:
+        return file.read()
+
+def test_extractors_agree(page):
+    if occupations.etree is None:
+        pytest.skip('lxml is not installed')
+    pd.testing.assert_frame_equal(extract_wage_table(page, 'bs4'), extract_wage_table(page, 'lxml'))
+
+def test_clean_wage_table_matches_the_row_by_row_cleanup():
+    df = synthetic_wage_table(500)
+    cleaned = df.copy()
+    clean_wage_table(cleaned)
+    legacy = df.copy()
+    legacy_clean_wage_table(legacy)
+    pd.testing.assert_frame_equal(legacy, cleaned, check_dtype=False)
+
+def test_build_occupations(page):
+    df = build_occupations(page)
+    assert len(df) == 10
+    assert df.loc[0, ['Occupation Title', 'NOC', 'Median Wage', 'NAICS_CODE']].tolist() == ['Legislators', '00010', 93000.0, '91']
+    assert df['Sector'].notna().all()
+
+# Both mappings come from the same rows of the occupation sectors table
+def test_sector_mappings():
+    noc_sectors, title_sectors = sector_mappings()
+    assert len(noc_sectors) == len(title_sectors) == 481
+    assert noc_sectors['00010'] == title_sectors['Legislators'] == 'Public administration [91]'
+
+def test_sector_mappings_with_repeated_codes(tmp_path):
+    path = tmp_path / 'occupation_sectors.csv'
+    path.write_text('# Sectors\nNOC,OCCUPATION_TITLE,SECTOR\n00010,Legislators,Public administration [91]\n'
+                    '00010,Senior government managers and officials,Public administration [91]\n', encoding='utf-8')
+    with pytest.raises(ValueError, match="more than one row per NOC: \\['00010'\\]"):
+        sector_mappings(str(path))
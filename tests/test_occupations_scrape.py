@@ -0,0 +1,41 @@
+import os
+
+import pytest
+import requests
+
+import occupations
+from http_cache import ResponseCache
+
+@pytest.mark.parametrize('cached', [False, True])
+def test_fetch_pages_records_errors_per_url(fake_jobbank, tmp_path, cached):
+    urls = {location: occupations.wage_report_url(location) for location in ['ab', 'zz', 'ab/9999']}
+    cache = ResponseCache(str(tmp_path / 'cache')) if cached else None
+    pages, errors = occupations.fetch_pages(list(urls.values()), occupations.build_occupations, cache=cache)
+
+    assert list(pages) == [urls['ab']]
+    assert len(pages[urls['ab']]) == 10
+    assert isinstance(errors[urls['zz']], requests.HTTPError)
+    assert isinstance(errors[urls['ab/9999']], occupations.PageError)
+    assert 'no wage table' in str(errors[urls['ab/9999']])
+
+def test_run_occupations_writes_the_locations_that_worked(fake_jobbank, capsys):
+    with pytest.raises(RuntimeError, match='Could not get the wage reports of zz, ab/9999'):
+        occupations.run_occupations(['ab', 'zz', 'ab/9999'])
+    out = capsys.readouterr().out
+
+    assert 'Could not get the wage report for zz' in out
+    assert 'Could not get the wage report for ab/9999' in out
+    assert os.path.exists(occupations.occupations_output('ab', 'csv'))
+    assert not os.path.exists(occupations.occupations_output('zz', 'csv'))
+    assert not os.path.exists(occupations.occupations_output('ab/9999', 'csv'))
+
+def test_run_occupations_reuses_the_cached_page(fake_jobbank, capsys):
+    occupations.run_occupations(['ab'])
+    with open(occupations.occupations_output('ab', 'csv'), 'rb') as file:
+        built = file.read()
+    capsys.readouterr()
+
+    occupations.run_occupations(['ab'])
+    assert '1 hits, 0 misses' in capsys.readouterr().out
+    with open(occupations.occupations_output('ab', 'csv'), 'rb') as file:
+        assert file.read() == built
@@ -0,0 +1,77 @@
+import hashlib
+import os
+
+import pandas as pd
+
+from outputs import write_csv_if_changed, write_parquet_dataset
+
+keys = ['YEAR', 'Sector']
+
+def wages():
+    return pd.DataFrame({'YEAR': [2022, 2022, 2023, 2023], 'Sector': ['Construction ', 'Utilities ', 'Construction ', 'Utilities '],
+                         'Hourly Wage': [30.5, 40.0, 31.25, 41.0]})
+
+def read(path):
+    with open(path, encoding='utf-8', newline='') as file:
+        return file.read()
+
+def test_csv_is_only_written_when_its_rows_change(tmp_path):
+    path = tmp_path / 'wages.csv'
+    assert write_csv_if_changed(wages(), path, keys) == {'added': 4, 'changed': 0, 'removed': 0, 'written': True}
+    written = os.stat(path).st_mtime_ns
+
+    # The same rows in another order, or with their numbers formatted differently, are no change
+    reordered = wages().sample(frac=1, random_state=0)
+    assert write_csv_if_changed(reordered, path, keys)['written'] is False
+    reformatted = wages().astype({'Hourly Wage': object})
+    reformatted.loc[1, 'Hourly Wage'] = 40
+    assert write_csv_if_changed(reformatted, path, keys)['written'] is False
+    assert os.stat(path).st_mtime_ns == written
+
+def test_changed_rows_keep_their_place(tmp_path):
+    path = tmp_path / 'wages.csv'
+    delta_path = tmp_path / 'wages.delta.csv'
+    write_csv_if_changed(wages(), path, keys)
+
+    df = wages()
+    df.loc[1, 'Hourly Wage'] = 42.0
+    df = pd.concat([df.drop(index=2), pd.DataFrame({'YEAR': [2024], 'Sector': ['Construction '], 'Hourly Wage': [32.0]})])
+    changes = write_csv_if_changed(df.iloc[::-1], path, keys, delta_path)
+
+    assert changes == {'added': 1, 'changed': 1, 'removed': 1, 'written': True}
+    assert read(path) == ('YEAR,Sector,Hourly Wage\n2022,Construction ,30.5\n2022,Utilities ,42.0\n'
+                          '2023,Utilities ,41.0\n2024,Construction ,32.0\n')
+    delta = pd.read_csv(delta_path)
+    assert delta['CHANGE'].tolist() == ['added', 'changed', 'removed']
+    assert delta['YEAR'].tolist() == [2024, 2022, 2023]
+
+    # A write without changes removes the delta of the previous one
+    write_csv_if_changed(df, path, keys, delta_path)
+    assert not os.path.exists(delta_path)
+
+def test_csv_with_other_columns_is_replaced(tmp_path):
+    path = tmp_path / 'wages.csv'
+    write_csv_if_changed(wages(), path, keys)
+    changes = write_csv_if_changed(wages().drop(columns='Hourly Wage'), path, keys)
+    assert changes == {'added': 4, 'changed': 0, 'removed': 4, 'written': True}
+    assert read(path).startswith('YEAR,Sector\n')
+
+def file_hashes(path):
+    return {os.path.relpath(os.path.join(folder, name), path): hashlib.sha256(open(os.path.join(folder, name), 'rb').read()).hexdigest()
+            for folder, _, names in os.walk(path) for name in names}
+
+def test_parquet_partitions_keep_their_files(tmp_path):
+    path = tmp_path / 'wages.parquet'
+    write_parquet_dataset(wages(), path, keys)
+    written = file_hashes(path)
+    assert sorted(written) == [os.path.join(f'YEAR={year}', f'Sector={sector}', 'part-0.parquet')
+                               for year in [2022, 2023] for sector in ['Construction', 'Utilities']]
+
+    df = wages()
+    df.loc[3, 'Hourly Wage'] = 42.0
+    write_parquet_dataset(df, path, keys)
+    rewritten = file_hashes(path)
+    assert [name for name in written if written[name] != rewritten[name]] == [os.path.join('YEAR=2023', 'Sector=Utilities', 'part-0.parquet')]
+
+    read_back = pd.read_parquet(path, filters=[('Sector', '==', 'Construction')])
+    assert read_back['Hourly Wage'].tolist() == [30.5, 31.25]
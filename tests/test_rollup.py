@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+import rollup
+import statcan
+import wages_hours
+from benchmark import NAICS, synthetic_lfs_tables, write_table_zip
+from normalization import clean_sector_names
+from rollup import ALL, load_rollup, update_rollup, write_rollup
+
+# Alberta's wages and hours built from synthetic tables, like the pipeline does before rolling them up
+@pytest.fixture
+def wages_and_hours(build_folder, tmp_path):
+    tables = []
+    for table_id, table, filters in zip([wages_hours.table_id_wages, wages_hours.table_id_hours], synthetic_lfs_tables(1),
+                                        [wages_hours.wages_filters, wages_hours.hours_filters]):
+        tables.append(statcan.read_table_zip(write_table_zip(table, table_id, tmp_path), table_id, filters,
+                                             wages_hours.used_column, categories=wages_hours.dimension_columns))
+    df = wages_hours.pivot_wages_and_hours(*tables)
+    clean_sector_names(df, NAICS, 'NAICS_CODE')
+    wages_hours.insert_wages(df)
+    return df
+
+# The previous rollup goes through its CSV like it does between two builds
+def previous_build(df):
+    write_rollup(*update_rollup(df)[:2], 'rollup.csv', 'fingerprints.json')
+    return load_rollup('rollup.csv', 'fingerprints.json')
+
+def test_incremental_rollup_matches_a_full_one(wages_and_hours):
+    df = wages_and_hours
+    previous, fingerprints = previous_build(df)
+    newest = df['YEAR'] == df['YEAR'].max()
+    df.loc[newest, 'Hourly Wage'] = df.loc[newest, 'Hourly Wage'] * 1.01
+
+    incremental, _, years = update_rollup(df, previous, fingerprints)
+    assert years == [df['YEAR'].max()]
+    assert incremental.to_csv(index=False) == update_rollup(df)[0].to_csv(index=False)
+
+def test_new_rollup_format_rolls_up_every_year(wages_and_hours, monkeypatch):
+    previous, fingerprints = previous_build(wages_and_hours)
+    assert update_rollup(wages_and_hours, previous, fingerprints)[2] == []
+    monkeypatch.setattr(rollup, 'rollup_format', rollup.rollup_format + 1)
+    assert len(update_rollup(wages_and_hours, previous, fingerprints)[2]) == wages_and_hours['YEAR'].nunique()
+
+# The 'All' rows hold the totals Stats Canada publishes instead of sums over overlapping values
+def test_all_rows_are_the_totals(wages_and_hours):
+    df = wages_and_hours
+    rolled_up = update_rollup(df)[0]
+    rows = rolled_up[(rolled_up[NAICS] == 'Construction ') & (rolled_up['Age group'] == ALL) & (rolled_up['Sex'] != ALL)]
+    recent = df[(df[NAICS] == 'Construction ') & (df['Age group'] == '15 years and over')]
+    grouped = recent.groupby(['YEAR', 'Sex'], observed=True)['Hourly Wage'].mean()
+    assert len(rows) == len(grouped)
+    np.testing.assert_allclose(rows.sort_values(['YEAR', 'Sex'])['Hourly Wage'], grouped.sort_index())
+
+    everything = rolled_up[(rolled_up[[NAICS, 'Sex', 'Age group']] == ALL).all(axis=1)]
+    totals = df[(df[NAICS] == 'Total employees, all industries') & (df['Sex'] == 'Both sexes') &
+                (df['Age group'] == '15 years and over')]
+    np.testing.assert_allclose(everything['Hourly Wage'], totals.groupby('YEAR')['Hourly Wage'].mean())
@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+
+from conftest import root_folder
+from occupations import occupations_output
+from wages_hours import wages_and_hours_csv
+
+# Run the script in the build folder against the fake server, returning its exit status and output
+def run_script(server, *arguments):
+    environment = dict(os.environ, STATCAN_WDS_URL=f'{server.url}/t1/wds/rest/', JOBBANK_URL=server.url)
+    result = subprocess.run([sys.executable, os.path.join(root_folder, 'Wages_and_hours_script.py'), *arguments],
+                            env=environment, capture_output=True, text=True, timeout=300)
+    return result.returncode, result.stdout + result.stderr
+
+def test_script_succeeds(fake_statcan, fake_jobbank):
+    status, output = run_script(fake_statcan, '--refresh', '--export', 'sectors', 'nocs')
+    assert status == 0, output
+    assert os.path.exists(wages_and_hours_csv)
+    assert os.path.exists(occupations_output('ab', 'csv'))
+    assert os.listdir(os.path.join('Datasets', 'nocs'))
+
+def test_script_fails_when_a_wage_report_is_missing(fake_statcan, fake_jobbank):
+    del fake_jobbank.files['/wagereport/location/ab']
+    status, output = run_script(fake_jobbank, '--refresh', '--export', 'sectors', 'nocs')
+    assert status == 1, output
+    assert 'The occupations pipeline failed' in output
+    assert 'Could not get the wage reports of ab' in output
+    # The other pipeline and its export still ran, the occupations weren't exported again
+    assert os.path.exists(wages_and_hours_csv)
+    assert os.listdir(os.path.join('Datasets', 'sectors'))
+    assert not os.path.exists(os.path.join('Datasets', 'nocs'))
@@ -0,0 +1,110 @@
+import http.client
+import json
+import threading
+from urllib.parse import quote, urlencode
+
+import pandas as pd
+import pytest
+
+import server
+from wages_hours import wages_and_hours_csv
+
+NAICS = 'North American Industry Classification System (NAICS)'
+sectors = ['Construction ', 'Finance, insurance, real estate, rental and leasing ', 'Professional, scientific and technical services ']
+
+# A small wages CSV served from its own folder, sector names ending with a space like the built CSV
+def write_wages(folder):
+    rows = [{'YEAR': year, NAICS: sector, 'Sex': sex, 'Age group': '15 years and over',
+             'Hourly Wage': 20.0 + year - 2020 + number, 'Weekly Hours': 35.0}
+            for year in [2020, 2021] for number, sector in enumerate(sectors) for sex in ['Males', 'Females']]
+    pd.DataFrame(rows).to_csv(folder / wages_and_hours_csv, index=False, encoding='utf-8')
+
+@pytest.fixture
+def wages_server(tmp_path):
+    write_wages(tmp_path)
+    query_server = server.start_server(str(tmp_path), port=0, verbose=False)
+    threading.Thread(target=query_server.serve_forever, daemon=True).start()
+    yield query_server
+    query_server.shutdown()
+    query_server.server_close()
+
+@pytest.fixture
+def snapshot(tmp_path):
+    write_wages(tmp_path)
+    return server.Snapshot('wages', tmp_path / wages_and_hours_csv)
+
+def run_query(snapshot, parameters):
+    return json.loads(snapshot.run_query(tuple((parameter, tuple(values)) for parameter, values in parameters.items())))
+
+def test_run_query_filters_with_the_indexes(snapshot):
+    rows = run_query(snapshot, {'sector': ['Construction', 'Utilities'], 'year': ['2021'], 'sex': ['Males']})
+    assert [(row['YEAR'], row[NAICS], row['Sex']) for row in rows] == [(2021, 'Construction ', 'Males')]
+    assert run_query(snapshot, {'year': ['2019']}) == []
+
+def test_run_query_intersects_years_with_the_year_range(snapshot):
+    assert run_query(snapshot, {'year': ['2020', '2021'], 'year_from': ['2021'], 'group_by': ['YEAR'], 'agg': ['count'],
+                                'measures': ['Sex']}) == [{'YEAR': 2021, 'Sex': 6}]
+    assert run_query(snapshot, {'year_to': ['2019'], 'group_by': ['YEAR']}) == []
+
+def test_run_query_limit(snapshot):
+    assert len(run_query(snapshot, {'limit': ['3']})) == 3
+    assert run_query(snapshot, {'limit': ['0']}) == []
+
+@pytest.mark.parametrize('parameters, message', [
+    ({'colour': ['red']}, 'Unknown parameters'),
+    ({'year': ['twenty']}, 'whole numbers'),
+    ({'group_by': ['Region']}, 'Unknown columns'),
+    ({'group_by': ['YEAR'], 'measures': [NAICS]}, 'not numbers'),
+])
+def test_run_query_errors(snapshot, parameters, message):
+    with pytest.raises(server.QueryError, match=message):
+        run_query(snapshot, parameters)
+
+def get(query_server, path, parameters):
+    connection = http.client.HTTPConnection('127.0.0.1', query_server.server_address[1])
+    connection.request('GET', f'{path}?{urlencode(parameters, quote_via=quote)}')
+    response = connection.getresponse()
+    body = json.loads(response.read())
+    connection.close()
+    return response.status, body
+
+def test_sector_with_commas(wages_server):
+    status, rows = get(wages_server, '/wages', [('year', '2020'), ('sex', 'Males'),
+                                                ('sector', 'Finance, insurance, real estate, rental and leasing')])
+    assert status == 200
+    assert [row[NAICS] for row in rows] == ['Finance, insurance, real estate, rental and leasing ']
+
+def test_repeated_filter_values(wages_server):
+    status, rows = get(wages_server, '/wages', [('year', '2021'), ('sex', 'Females'), ('sector', 'Construction'),
+                                                ('sector', 'Professional, scientific and technical services')])
+    assert status == 200
+    assert sorted(row[NAICS] for row in rows) == [sectors[0], sectors[2]]
+
+def test_group_by_and_measures_are_comma_separated(wages_server):
+    status, rows = get(wages_server, '/wages', [('group_by', 'YEAR,Sex'), ('measures', 'Hourly Wage,Weekly Hours'),
+                                                ('agg', 'max')])
+    assert status == 200
+    assert rows[0] == {'YEAR': 2020, 'Sex': 'Females', 'Hourly Wage': 22.0, 'Weekly Hours': 35.0}
+    assert len(rows) == 4
+
+def test_year_range(wages_server):
+    status, rows = get(wages_server, '/wages', [('year_from', '2021'), ('group_by', 'YEAR'), ('agg', 'count'),
+                                                ('measures', 'Hourly Wage')])
+    assert status == 200
+    assert rows == [{'YEAR': 2021, 'Hourly Wage': 6}]
+
+@pytest.mark.parametrize('parameters', [
+    [('group_by', 'YEAR'), ('measures', 'Sex'), ('agg', 'mean')],
+    [('limit', '-5')],
+    [('limit', 'ten')],
+    [('colour', 'red')],
+    [('group_by', 'YEAR'), ('agg', 'mode')],
+])
+def test_bad_queries(wages_server, parameters):
+    status, body = get(wages_server, '/wages', parameters)
+    assert status == 400
+    assert 'error' in body
+
+def test_unknown_dataset(wages_server):
+    status, body = get(wages_server, '/salaries', [])
+    assert status == 404
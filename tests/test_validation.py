@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from validation import ValidationError, validate_frame
+
+NAICS = 'North American Industry Classification System (NAICS)'
+
+def hours_table(rows=4):
+    return pd.DataFrame({
+        'REF_DATE': pd.to_datetime(['2023-01-01'] * rows), 'GEO': 'Alberta',
+        'Actual hours worked': 'Average actual hours (worked in reference week, main job)',
+        NAICS: ['Construction [23]', 'Utilities [22]', 'Public administration [91]', 'Total employees, all industries'][:rows],
+        'Sex': 'Both sexes', 'UOM': 'Hours', 'VALUE': np.linspace(30, 40, rows)})
+
+def test_valid_frame():
+    report = validate_frame(hours_table(), 'hours table')
+    assert report['rows'] == 4
+    assert report['warnings'] == []
+
+def test_every_problem_is_reported():
+    df = hours_table().drop(columns='GEO')
+    df['VALUE'] = [30.0, 200.0, np.nan, np.nan]
+    df['REF_DATE'] = df['REF_DATE'].astype(str)
+    df.loc[3, NAICS] = 'Construction [23]'
+    with pytest.raises(ValidationError) as error:
+        validate_frame(df, 'hours table')
+    message = str(error.value)
+    assert "missing columns ['GEO']" in message
+    assert "{'REF_DATE': 'label'}" in message
+    assert '1 values of VALUE are outside [0, 168]' in message
+    assert '1 rows repeat the keys' in message
+
+def test_missing_values():
+    df = hours_table()
+    df['VALUE'] = [30.0, np.nan, np.nan, np.nan]
+    with pytest.raises(ValidationError, match='75.0% of VALUE is missing, at most 50% is allowed'):
+        validate_frame(df, 'hours table')
+
+# A sector Stats Canada newly publishes is only a warning, so the outputs are still refreshed
+def test_unknown_labels_are_warnings():
+    df = hours_table()
+    df.loc[0, NAICS] = 'Space exploration [99]'
+    report = validate_frame(df, 'hours table')
+    assert len(report['warnings']) == 1
+    assert 'Space exploration [99]' in report['warnings'][0]
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import statcan
+import wages_hours
+from benchmark import NAICS, legacy_merge_wages_and_hours, synthetic_lfs_tables, write_table_zip
+from normalization import clean_sector_names
+
+# Synthetic national tables written as the zips Stats Canada serves
+@pytest.fixture
+def table_zips(build_folder, tmp_path):
+    wages, hours = synthetic_lfs_tables(2)
+    return {table_id: write_table_zip(table, table_id, tmp_path)
+            for table_id, table in [(wages_hours.table_id_wages, wages), (wages_hours.table_id_hours, hours)]}
+
+def read_tables(table_zips, filters):
+    return [statcan.read_table_zip(table_zips[table_id], table_id, filters(table_id), wages_hours.used_column,
+                                   categories=wages_hours.dimension_columns)
+            for table_id in [wages_hours.table_id_wages, wages_hours.table_id_hours]]
+
+def pipeline_filters(table_id):
+    return wages_hours.wages_filters if table_id == wages_hours.table_id_wages else wages_hours.hours_filters
+
+# Every region and type of work with some rows missing from each table, so keys found in only one table are covered
+def test_pivot_matches_the_merges(table_zips):
+    def national_filters(table_id):
+        return {column: condition for column, condition in pipeline_filters(table_id).items()
+                if column not in ['GEO', 'Type of work']}
+    rng = np.random.default_rng(0)
+    wages, hours = [table[rng.random(len(table)) > 0.05] for table in read_tables(table_zips, national_filters)]
+
+    pivoted = wages_hours.pivot_wages_and_hours(wages.copy(), hours.copy())
+    pd.testing.assert_frame_equal(pivoted, legacy_merge_wages_and_hours(wages.copy(), hours.copy()))
+    assert pivoted['Hourly Wage'].isna().any() and pivoted['Weekly Hours'].isna().any()
+
+def test_pivot_rejects_repeated_keys(table_zips):
+    wages, hours = read_tables(table_zips, pipeline_filters)
+    with pytest.raises(ValueError):
+        wages_hours.pivot_wages_and_hours(pd.concat([wages, wages.head(1)]), hours)
+    with pytest.raises(ValueError):
+        wages_hours.pivot_wages_and_hours(wages, pd.concat([hours, hours.head(1)]))
+
+def run_pipeline(tables):
+    df = wages_hours.pivot_wages_and_hours(*tables)
+    clean_sector_names(df, NAICS, 'NAICS_CODE')
+    wages_hours.insert_wages(df)
+    return df
+
+def test_pushed_down_filters_match_filtering_afterwards(table_zips):
+    query = wages_hours.WagesAndHours().where(sector='Construction', sex=['Males', 'Females']).years(2020, 2023)
+    full = run_pipeline(read_tables(table_zips, pipeline_filters))
+    expected = full[(full[NAICS] == 'Construction ') & full['Sex'].isin(['Males', 'Females']) &
+                    full['YEAR'].between(2020, 2023)].reset_index(drop=True)
+
+    pushed = run_pipeline(read_tables(table_zips, query.table_filters))
+    # Four years of two sexes in the four age groups of the tables
+    assert len(pushed) == 4 * 2 * 4
+    assert pushed.astype(object).equals(expected.astype(object))
@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+import reference_rates
+import statcan
+import wages_hours
+from conftest import release
+
+outputs = [wages_hours.wages_and_hours_csv, wages_hours.living_wages_csv, wages_hours.rollup_csv]
+
+def read_outputs():
+    contents = {}
+    for path in outputs:
+        with open(path, 'rb') as file:
+            contents[path] = (file.read(), os.stat(path).st_mtime_ns)
+    return contents
+
+def downloads(server):
+    return [path for path in server.requests if path.startswith('/zips/')]
+
+def test_changed_tables():
+    recorded = {'14100064': {'releaseTime': release}, '14100037': {'releaseTime': release}}
+    releases = {'14100064': {'releaseTime': release}, '14100037': {'releaseTime': '2025-01-10T08:30'},
+                '14100065': {'releaseTime': release}}
+    assert statcan.changed_tables(releases, recorded) == ['14100037', '14100065']
+    assert statcan.changed_tables(recorded, recorded) == []
+
+def test_recorded_releases(tmp_path):
+    path = tmp_path / 'releases.json'
+    assert statcan.load_recorded_releases(path) == {}
+    releases = {'14100064': {'releaseTime': release, 'cubeEndDate': '2024-01-01'}}
+    statcan.save_recorded_releases(releases, path)
+    assert statcan.load_recorded_releases(path) == releases
+
+def test_tables_parse_key_names_the_filters(monkeypatch):
+    key = wages_hours.tables_parse_key()
+    monkeypatch.setitem(wages_hours.wages_filters, 'GEO', 'Ontario')
+    wages_hours.tables_parse_key.cache_clear()
+    assert wages_hours.tables_parse_key() != key
+    monkeypatch.undo()
+    wages_hours.tables_parse_key.cache_clear()
+    assert wages_hours.tables_parse_key() == key
+
+def test_refresh_skips_unchanged_tables(fake_statcan, capsys):
+    wages_hours.run_wages_and_hours(refresh=True)
+    recorded = statcan.load_recorded_releases()
+    assert recorded.pop(wages_hours.reference_key) == {'hash': reference_rates.reference_hash(reference_rates.reference_folder)}
+    assert recorded == statcan.get_table_releases([wages_hours.table_id_wages, wages_hours.table_id_hours])
+    built = read_outputs()
+    downloaded = len(downloads(fake_statcan))
+    capsys.readouterr()
+
+    wages_hours.run_wages_and_hours(refresh=True)
+    assert 'skipping wages and hours refresh' in capsys.readouterr().out
+    assert read_outputs() == built
+    assert len(downloads(fake_statcan)) == downloaded
+
+def test_refresh_rebuilds_new_release(fake_statcan, capsys):
+    wages_hours.run_wages_and_hours(refresh=True)
+    built = {path: content for path, (content, _) in read_outputs().items()}
+    downloaded = len(downloads(fake_statcan))
+    fake_statcan.releases[wages_hours.table_id_hours] = '2025-01-10T08:30'
+    capsys.readouterr()
+
+    wages_hours.run_wages_and_hours(refresh=True)
+    assert 'skipping' not in capsys.readouterr().out
+    assert len(downloads(fake_statcan)) > downloaded
+    assert statcan.load_recorded_releases()[wages_hours.table_id_hours]['releaseTime'] == '2025-01-10T08:30'
+    # The tables are the same, so the CSVs keep their bytes
+    assert {path: content for path, (content, _) in read_outputs().items()} == built
+
+def test_refresh_rebuilds_changed_reference_rates(fake_statcan, monkeypatch, capsys):
+    wages_hours.run_wages_and_hours(refresh=True)
+    # A new rates format changes the hash of the reference rates like an edit of the files would
+    monkeypatch.setattr(reference_rates, 'rates_format', reference_rates.rates_format + 1)
+    capsys.readouterr()
+
+    wages_hours.run_wages_and_hours(refresh=True)
+    assert 'skipping' not in capsys.readouterr().out
+    recorded = statcan.load_recorded_releases()[wages_hours.reference_key]
+    assert recorded == {'hash': reference_rates.reference_hash(reference_rates.reference_folder)}
+
+    wages_hours.run_wages_and_hours(refresh=True)
+    assert 'skipping wages and hours refresh' in capsys.readouterr().out
+
+def test_refresh_rebuilds_missing_output(fake_statcan, capsys):
+    wages_hours.run_wages_and_hours(refresh=True)
+    os.remove(wages_hours.rollup_csv)
+    capsys.readouterr()
+
+    wages_hours.run_wages_and_hours(refresh=True)
+    assert 'skipping' not in capsys.readouterr().out
+    assert os.path.exists(wages_hours.rollup_csv)
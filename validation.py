@@ -0,0 +1,170 @@
+import pandas as pd
+import time
+from functools import lru_cache
+
+from normalization import sector_name
+from profiling import stage
+from sector_lookup import sector_mappings
+
+NAICS = 'North American Industry Classification System (NAICS)'
+
+# Columns of the Stats Canada table CSVs: the ones the pipeline reads, and the ones it drops, which are only
+# expected so that a change to the table's layout is noticed
+statcan_columns = {
+    'wages table': ['REF_DATE', 'GEO', 'Wages', 'Type of work', NAICS, 'Sex', 'Age group', 'UOM', 'VALUE'],
+    'hours table': ['REF_DATE', 'GEO', 'Actual hours worked', NAICS, 'Sex', 'UOM', 'VALUE'],
+}
+dropped_statcan_columns = ['DGUID', 'UOM_ID', 'SCALAR_FACTOR', 'SCALAR_ID', 'VECTOR', 'COORDINATE', 'STATUS', 'SYMBOL',
+                           'TERMINATED', 'DECIMALS']
+
+# Schema of each frame checked by the pipelines:
+# columns: the kind of every column, which has to be there (label for text or categorical columns)
+# keys: columns that identify a row, rows where one of them is missing aren't compared
+# ranges: smallest and largest allowed values, None for no bound
+# null_ratios: largest share of missing values allowed in a column
+# labels: columns whose labels are expected to be known, by the name of the set of known labels. Unknown labels,
+# like a sector Stats Canada newly publishes, are only reported so they don't stop the outputs from being refreshed
+schemas = {
+    'wages table': {
+        'columns': {'REF_DATE': 'datetime', 'GEO': 'label', 'Wages': 'label', 'Type of work': 'label', NAICS: 'label',
+                    'Sex': 'label', 'Age group': 'label', 'UOM': 'label', 'VALUE': 'float'},
+        'keys': ['REF_DATE', 'GEO', 'Wages', 'Type of work', NAICS, 'Sex', 'Age group'],
+        'ranges': {'VALUE': (0, None)},
+        'null_ratios': {'REF_DATE': 0, NAICS: 0, 'VALUE': 0.5},
+        'labels': {NAICS: 'sectors'},
+    },
+    'hours table': {
+        'columns': {'REF_DATE': 'datetime', 'GEO': 'label', 'Actual hours worked': 'label', NAICS: 'label',
+                    'Sex': 'label', 'UOM': 'label', 'VALUE': 'float'},
+        'keys': ['REF_DATE', 'GEO', 'Actual hours worked', NAICS, 'Sex'],
+        'ranges': {'VALUE': (0, 168)},
+        'null_ratios': {'REF_DATE': 0, NAICS: 0, 'VALUE': 0.5},
+        'labels': {NAICS: 'sectors'},
+    },
+    'wages and hours': {
+        'columns': {'REF_DATE': 'datetime', 'GEO': 'label', 'Type of work': 'label', NAICS: 'label', 'NAICS_CODE': 'label',
+                    'Sex': 'label', 'Age group': 'label', 'UOM_wages': 'label', 'Hourly Wage': 'float',
+                    'Weekly Wage': 'float', 'Actual hours worked': 'label', 'UOM_hours': 'label', 'Weekly Hours': 'float',
+                    'YEAR': 'integer', 'MINIMUM_WAGE': 'float', 'LIVING_WAGE': 'float'},
+        'keys': ['REF_DATE', 'GEO', NAICS, 'Sex', 'Type of work', 'Age group'],
+        'ranges': {'Hourly Wage': (0, None), 'Weekly Wage': (0, None), 'Weekly Hours': (0, 168),
+                   'MINIMUM_WAGE': (0, None), 'LIVING_WAGE': (0, None)},
+        # Minimum wages are only known from late 2005 on and living wages from 2014 on, a rate missing from
+        # more rows than that means the reference rates weren't joined
+        'null_ratios': {'REF_DATE': 0, NAICS: 0, 'Sex': 0, 'YEAR': 0, 'Hourly Wage': 0.5, 'Weekly Hours': 0.5,
+                        'MINIMUM_WAGE': 0.5, 'LIVING_WAGE': 0.8},
+        'labels': {NAICS: 'sectors'},
+    },
+    'occupations': {
+        'columns': {'Occupation': 'label', 'Low Wage': 'float', 'Median Wage': 'float', 'High Wage': 'float',
+                    'Source': 'label', 'Occupation Title': 'label', 'NOC': 'label', 'Sector': 'label',
+                    'NAICS_CODE': 'label'},
+        'keys': ['NOC'],
+        'ranges': {'Low Wage': (0, None), 'Median Wage': (0, None), 'High Wage': (0, None)},
+        # Missing sectors are occupations that aren't in the sector mappings yet
+        'null_ratios': {'NOC': 0.05, 'Median Wage': 0.5, 'Sector': 0.1},
+    },
+}
+
+# Raised when a frame doesn't fit its schema, with every problem found
+class ValidationError(ValueError):
+    pass
+
+# Sectors the outputs can have: the ones occupations are mapped to and the total of all industries
+@lru_cache(maxsize=None)
+def known_sectors():
+    noc_sectors, _ = sector_mappings()
+    return frozenset(sector_name(label).strip() for label in noc_sectors.values()) | {'Total employees, all industries'}
+
+# Known labels by name, with the function normalizing a label before it is looked up
+known_labels = {'sectors': (known_sectors, lambda label: sector_name(label).strip())}
+
+# Kind of a column's dtype as named in the schemas
+def column_kind(dtype):
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return 'datetime'
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'bool'
+    if pd.api.types.is_integer_dtype(dtype):
+        return 'integer'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'float'
+    if isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(dtype) or dtype == object:
+        return 'label'
+    return str(dtype)
+
+# Check the header of a Stats Canada table before any of its rows are read. Missing columns that the pipeline reads
+# raise ValidationError, missing dropped columns are only reported since nothing uses them.
+def check_statcan_header(name, header):
+    missing = [column for column in statcan_columns[name] if column not in header]
+    if missing:
+        raise ValidationError(f'The {name} is missing the columns {missing}, it has {header}')
+    dropped = [column for column in dropped_statcan_columns if column not in header]
+    if dropped:
+        print(f'The {name} no longer has the columns {dropped}')
+
+# Check a frame against its schema, collecting every problem before raising ValidationError with all of them.
+# Each check covers whole columns at once: the missing values of all columns are counted together, the keys are
+# hashed once and labels are checked once per distinct label. Returns the rows checked, the warnings about
+# unknown labels and the seconds it took.
+def validate_frame(df, name):
+    start = time.perf_counter()
+    schema = schemas[name]
+    problems = []
+    warnings = []
+
+    missing = [column for column in schema['columns'] if column not in df.columns]
+    if missing:
+        problems.append(f'missing columns {missing}')
+    wrong_kinds = {column: column_kind(df[column].dtype) for column, kind in schema['columns'].items()
+                   if column in df.columns and column_kind(df[column].dtype) != kind}
+    if wrong_kinds:
+        problems.append(f'columns of the wrong type {wrong_kinds}, expected '
+                        f'{ {column: schema["columns"][column] for column in wrong_kinds} }')
+
+    null_ratios = df.isna().mean() if len(df) else pd.Series(0.0, index=df.columns)
+    for column, allowed in schema.get('null_ratios', {}).items():
+        if column in df.columns and null_ratios[column] > allowed:
+            problems.append(f'{null_ratios[column]:.1%} of {column} is missing, at most {allowed:.0%} is allowed')
+
+    for column, (smallest, largest) in schema.get('ranges', {}).items():
+        if column not in df.columns or wrong_kinds.get(column):
+            continue
+        values = df[column]
+        outside = pd.Series(False, index=df.index)
+        if smallest is not None:
+            outside |= values < smallest
+        if largest is not None:
+            outside |= values > largest
+        if outside.any():
+            problems.append(f'{outside.sum()} values of {column} are outside [{smallest}, {largest}], '
+                            f'e.g. {values[outside].head(3).tolist()}')
+
+    keys = [column for column in schema.get('keys', []) if column in df.columns]
+    if keys:
+        complete = df[keys].notna().all(axis=1) if len(keys) > 1 else df[keys[0]].notna()
+        duplicated = df.loc[complete, keys].duplicated()
+        if duplicated.any():
+            problems.append(f'{duplicated.sum()} rows repeat the keys {keys}, e.g. '
+                            f'{df.loc[complete, keys][duplicated].head(3).to_dict("records")}')
+
+    for column, labels in schema.get('labels', {}).items():
+        if column in df.columns:
+            known, normalize = known_labels[labels]
+            unknown = [label for label in df[column].dropna().unique() if normalize(label) not in known()]
+            if unknown:
+                warnings.append(f'{column} has labels that are not among the known {labels}: {sorted(unknown)}')
+
+    if problems:
+        raise ValidationError(f'The {name} ({len(df):,} rows) failed validation:\n  ' + '\n  '.join(problems))
+    return {'rows': len(df), 'warnings': warnings, 'seconds': time.perf_counter() - start}
+
+# Validate a frame in its own pipeline stage and report how long it took
+def validate_stage(df, name):
+    with stage(f'validate {name}', rows_in=len(df)) as record:
+        report = validate_frame(df, name)
+        record['rows_out'] = len(df)
+    print(f'Validated the {name}: {report["rows"]:,} rows in {report["seconds"] * 1000:.1f}ms')
+    for warning in report['warnings']:
+        print(f'  {warning}')
+    return report
@@ -0,0 +1,295 @@
+import hashlib
+import json
+import os
+import pandas as pd
+from functools import lru_cache, partial
+
+import statcan
+from compact import align_categories, downcast_numbers, to_categories
+from enrichment import insert_rates_as_of
+from http_cache import ResponseCache
+from normalization import clean_sector_names, normalize_labels, sector_name
+from outputs import delta_output, describe_changes, write_csv_if_changed, write_parquet_dataset
+from profiling import stage
+from reference_rates import living_wages_file, load_reference_rates, reference_folder, reference_hash, row_keys
+from rollup import load_rollup, update_rollup, write_rollup
+from validation import check_statcan_header, validate_stage
+
+# Load Data from Stats Canada
+table_id_wages = '14100064' # hourly wages
+table_id_hours = '14100037' # weekly hours
+# Entry of the recorded releases holding the hash of the reference rates the outputs were built with
+reference_key = 'reference_rates'
+
+# Columns of the Stats Canada tables that are not used
+unused_columns = ['DGUID','UOM_ID','SCALAR_FACTOR','SCALAR_ID','VECTOR','COORDINATE','STATUS','SYMBOL','TERMINATED','DECIMALS']
+
+def used_column(column):
+    return column not in unused_columns
+
+# Label columns that repeat on every row, loaded as categoricals
+dimension_columns = ['GEO', 'Wages', 'Type of work', 'North American Industry Classification System (NAICS)', 'Sex',
+                     'Age group', 'Actual hours worked', 'UOM']
+
+# Rows of each table that are kept: Alberta, hourly and weekly wage, and both full- and part-time
+wages_filters = {
+    'GEO': 'Alberta',
+    'UOM': lambda uom: uom != 'Persons', # Remove person counts
+    'Wages': ['Average hourly wage rate', 'Average weekly wage rate'],
+    'Type of work': 'Both full- and part-time employees'}
+hours_filters = {
+    'GEO': 'Alberta',
+    'UOM': lambda uom: uom != 'Persons', # Remove person counts
+    'Actual hours worked': 'Average actual hours (worked in reference week, main job)'}
+
+# Version of the frames the tables are loaded as, to be raised whenever the functions in the filters or the reading change
+tables_format = 1
+
+# Key the loaded tables are cached under: a table that Stats Canada didn't change is read again when
+# its filters, columns or categories changed since it was cached. Functions can't be compared, so
+# only the other filters are hashed and tables_format has to be raised when a function changes.
+@lru_cache(maxsize=None)
+def tables_parse_key():
+    filters = [{column: None if callable(condition) else condition for column, condition in table_filters.items()}
+               for table_filters in [wages_filters, hours_filters]]
+    described = json.dumps([filters, unused_columns, dimension_columns], sort_keys=True)
+    return f'tables v{tables_format} {hashlib.sha256(described.encode("utf-8")).hexdigest()[:16]}'
+
+# Output files built from the Stats Canada tables
+wages_and_hours_csv = 'Complete_Wages_and_Hours_by_sector.csv'
+living_wages_csv = 'Living_Wages_Map.csv'
+wages_and_hours_parquet = 'Complete_Wages_and_Hours_by_sector.parquet'
+rollup_csv = 'Complete_Wages_and_Hours_rollup.csv'
+rollup_fingerprints = 'rollup_fingerprints.json'
+
+# Add a year column
+def clean_ref_date(df):
+    df['YEAR'] = df['REF_DATE'].array.year
+
+# Keys of the combined rows in the order they are sorted by, the hours are only broken down by the first four
+hours_keys = ['REF_DATE','GEO','North American Industry Classification System (NAICS)','Sex']
+wage_keys = hours_keys + ['Type of work','Age group']
+
+# Wage rows that become columns of the combined frame
+wage_measures = {'Average hourly wage rate': 'Hourly Wage', 'Average weekly wage rate': 'Weekly Wage'}
+
+# Combine the wages and hours into one frame with a row per key: the hourly and weekly wage rows are pivoted
+# into columns, and the hours are joined on their keys. Keys found in only one of the tables get missing values
+# for the other, and the rows are sorted by hours_keys then the wage only keys.
+def pivot_wages_and_hours(wages, hours):
+    hours = hours.rename(columns={'UOM':'UOM_hours','VALUE':'Weekly Hours'})
+    wages = wages[wages['Wages'].isin(list(wage_measures))].copy()
+    normalize_labels(wages, 'North American Industry Classification System (NAICS)')
+    normalize_labels(hours, 'North American Industry Classification System (NAICS)')
+    align_categories(wages, hours, hours_keys[1:])
+    to_categories(wages, ['Type of work','Age group','UOM'])
+    to_categories(hours, ['Actual hours worked','UOM_hours'])
+
+    # One row per wage key with a column per wage measure, the unit of the wages is the one of the hourly wage rows.
+    # Wages with more than one row per key and measure, or hours with more than one row per key, raise ValueError.
+    pivoted = wages.pivot(index=wage_keys, columns='Wages', values='VALUE')
+    pivoted = pivoted.reindex(columns=list(wage_measures)).rename(columns=wage_measures).reset_index()
+    hourly = wages.loc[wages['Wages'] == 'Average hourly wage rate', wage_keys + ['UOM']].rename(columns={'UOM': 'UOM_wages'})
+    pivoted = pivoted.merge(hourly, on=wage_keys, how='left')
+
+    # Hours without any wages get rows of their own
+    df = pivoted.merge(hours, on=hours_keys, how='outer', validate='many_to_one')
+    df = df.sort_values(wage_keys, kind='stable', ignore_index=True)
+    return df[['REF_DATE', 'GEO', 'Type of work', 'North American Industry Classification System (NAICS)', 'Sex',
+               'Age group', 'UOM_wages', 'Hourly Wage', 'Weekly Wage', 'Actual hours worked', 'UOM_hours',
+               'Weekly Hours']]
+
+# The Stats Canada tables are annual, the REF_DATE of a row is the first day of the year it stands for
+reference_period = 'YS'
+
+# Add the year and insert the minimum wage and the mean living wage over the year of every row, each rate weighted
+# by how long it was in effect that year, so a minimum wage raised in October counts for a quarter of the year.
+# Years without a published living wage get none.
+def insert_wages(df):
+    clean_ref_date(df)
+    rates = load_reference_rates()
+    insert_rates_as_of(df, rates['minimum_wages'], period=reference_period)
+    df['MINIMUM_WAGE'] = df['MINIMUM_WAGE'].round(2)
+    insert_rates_as_of(df, rates['living_wage_aggregates'][['EFFECTIVE_DATE','END_DATE','LIVING_WAGE']],
+                       until='END_DATE', period=reference_period)
+    downcast_numbers(df, ['YEAR', 'MINIMUM_WAGE', 'LIVING_WAGE'])
+
+# Write the CSVs that changed and a typed columnar copy partitioned by year and sector for faster loading,
+# with the added, changed and removed rows of each CSV in delta_folder if given
+def write_wages_and_hours(df, delta_folder=None):
+    changes = write_csv_if_changed(df, wages_and_hours_csv, wage_keys, delta_output(delta_folder, wages_and_hours_csv))
+    print(describe_changes(wages_and_hours_csv, changes))
+    living_wages = load_reference_rates()['living_wages']
+    living_wages_changes = write_csv_if_changed(living_wages, living_wages_csv, row_keys[living_wages_file],
+                                                delta_output(delta_folder, living_wages_csv))
+    print(describe_changes(living_wages_csv, living_wages_changes))
+    # The columnar copy holds the same rows, so it only has to be written again when they changed
+    if changes['written'] or not os.path.exists(wages_and_hours_parquet):
+        write_parquet_dataset(df, wages_and_hours_parquet, ['YEAR', 'North American Industry Classification System (NAICS)'])
+
+# Query parameters of WagesAndHours.where with the column each one filters, named like the server's
+query_columns = {'sector': 'North American Industry Classification System (NAICS)', 'sex': 'Sex',
+                 'age_group': 'Age group', 'type_of_work': 'Type of work'}
+
+# Parameters that can be pushed down into the reading of each table, the hours aren't broken down by the others
+pushed_down_parameters = {table_id_wages: ['sector', 'sex', 'age_group', 'type_of_work'],
+                          table_id_hours: ['sector', 'sex']}
+
+# Sector labels of a column whose name without NAICS codes is one of names, looked up once per unique label
+def sector_condition(names):
+    def matches(column):
+        return column.isin([label for label in column.unique() if sector_name(label).strip() in names])
+    return matches
+
+# Years of the REF_DATE column from first to last, both included if given.
+# The dates are still text like '2020-01' while the table is read, so they are compared as text.
+def year_condition(first, last):
+    def matches(column):
+        mask = pd.Series(True, index=column.index)
+        if first is not None:
+            mask &= column >= f'{first:04d}'
+        if last is not None:
+            mask &= column < f'{last + 1:04d}'
+        return mask
+    return matches
+
+# Both conditions on the same column
+def both_conditions(first, second):
+    return lambda column: statcan.filter_mask(column, first) & statcan.filter_mask(column, second)
+
+# Lazy query over the wages and hours pipeline: load, pivot wages and hours, clean sector names and insert
+# the reference rates. where(), years() and select() only record what is asked for and nothing runs until
+# collect(), which pushes the filters down into the reading of the Stats Canada tables so the pivot and the
+# later stages only see the rows that are kept, e.g.
+# WagesAndHours().where(sector='Construction').years(2020, 2023).collect()
+class WagesAndHours:
+    def __init__(self, cache=None, conditions=None, year_range=(None, None), columns=None):
+        self.cache = cache
+        self.conditions = conditions or {}
+        self.year_range = year_range
+        self.columns = columns
+
+    # Keep the rows with one of the given labels, e.g. where(sector='Construction', sex=['Males', 'Females']).
+    # Sectors are named without their NAICS codes. Filtering a parameter again keeps the labels in both.
+    def where(self, **conditions):
+        unknown = [parameter for parameter in conditions if parameter not in query_columns]
+        if unknown:
+            raise ValueError(f'Unknown parameters {unknown}, the rows can be filtered by {list(query_columns)}')
+        combined = dict(self.conditions)
+        for parameter, labels in conditions.items():
+            labels = frozenset([labels] if isinstance(labels, str) else labels)
+            combined[parameter] = combined[parameter] & labels if parameter in combined else labels
+        return WagesAndHours(self.cache, combined, self.year_range, self.columns)
+
+    # Keep the years from first to last, both included, narrowing the years already asked for
+    def years(self, first=None, last=None):
+        firsts = [year for year in [self.year_range[0], first] if year is not None]
+        lasts = [year for year in [self.year_range[1], last] if year is not None]
+        year_range = (max(firsts) if firsts else None, min(lasts) if lasts else None)
+        return WagesAndHours(self.cache, self.conditions, year_range, self.columns)
+
+    # Keep only these columns of the result
+    def select(self, *columns):
+        return WagesAndHours(self.cache, self.conditions, self.year_range, list(columns))
+
+    # Filters of a table while it is read: the pipeline's own and the pushed down ones
+    def table_filters(self, table_id):
+        filters = dict(wages_filters if table_id == table_id_wages else hours_filters)
+        pushed = {query_columns[parameter]: sector_condition(labels) if parameter == 'sector' else list(labels)
+                  for parameter, labels in self.conditions.items() if parameter in pushed_down_parameters[table_id]}
+        if self.year_range != (None, None):
+            pushed['REF_DATE'] = year_condition(*self.year_range)
+        for column, condition in pushed.items():
+            filters[column] = both_conditions(filters[column], condition) if column in filters else condition
+        return filters
+
+    # Description of the filters, which also names them in the response cache since functions can't be compared
+    def describe_filters(self):
+        parts = [f'{parameter} in {sorted(labels)}' for parameter, labels in sorted(self.conditions.items())]
+        if self.year_range != (None, None):
+            parts.append(f'years {self.year_range[0] or ""}-{self.year_range[1] or ""}')
+        return parts
+
+    # The stages collect() runs, with the filters each table is read with
+    def explain(self):
+        plan = [f'load {name} ({table_id}) filtered on {", ".join(self.table_filters(table_id))}'
+                for name, table_id in [('wages', table_id_wages), ('hours', table_id_hours)]]
+        plan.append('pivot wages and hours')
+        residual = [parameter for parameter in self.conditions if parameter not in pushed_down_parameters[table_id_hours]]
+        if residual:
+            plan.append(f'drop the hours without wages, which have no {", ".join(residual)}')
+        plan += ['clean sector names', 'insert reference rates']
+        if self.columns is not None:
+            plan.append(f'select {", ".join(self.columns)}')
+        return plan
+
+    # Run the pipeline and return the frame
+    def collect(self):
+        parse_key = ', '.join([tables_parse_key()] + self.describe_filters())
+        # Load only the needed columns and the rows asked for, filtering while the tables are read,
+        # and check the tables against their schemas before the pivot
+        with stage('load wages') as record:
+            wages = statcan.load_table(table_id_wages, self.table_filters(table_id_wages), usecols=used_column,
+                                       cache=self.cache, parse_key=parse_key, categories=dimension_columns,
+                                       check_header=partial(check_statcan_header, 'wages table'))
+            record['rows_out'] = len(wages)
+        validate_stage(wages, 'wages table')
+        with stage('load hours') as record:
+            hours = statcan.load_table(table_id_hours, self.table_filters(table_id_hours), usecols=used_column,
+                                       cache=self.cache, parse_key=parse_key, categories=dimension_columns,
+                                       check_header=partial(check_statcan_header, 'hours table'))
+            record['rows_out'] = len(hours)
+        validate_stage(hours, 'hours table')
+
+        with stage('pivot wages and hours', rows_in=len(wages) + len(hours)) as record:
+            df = pivot_wages_and_hours(wages, hours)
+            # Hours without wages of the same keys are missing the wage only labels that were filtered on
+            residual = [query_columns[parameter] for parameter in self.conditions
+                        if parameter not in pushed_down_parameters[table_id_hours]]
+            if residual:
+                df = df[df[residual].notna().all(axis=1)].reset_index(drop=True)
+            record['rows_out'] = len(df)
+
+        with stage('clean sector names', rows_in=len(df)) as record:
+            clean_sector_names(df, 'North American Industry Classification System (NAICS)', 'NAICS_CODE')
+            record['rows_out'] = len(df)
+
+        with stage('insert reference rates', rows_in=len(df)) as record:
+            insert_wages(df)
+            record['rows_out'] = len(df)
+        return df if self.columns is None else df[self.columns]
+
+def build_wages_and_hours(cache=None, delta_folder=None):
+    df = WagesAndHours(cache).collect()
+    validate_stage(df, 'wages and hours')
+
+    with stage('write wages and hours', rows_in=len(df)) as record:
+        write_wages_and_hours(df, delta_folder)
+        record['rows_out'] = len(df)
+
+    # Only the years whose rows changed since the last build are rolled up again
+    with stage('rollup', rows_in=len(df)) as record:
+        rollup, fingerprints, years = update_rollup(df, *load_rollup(rollup_csv, rollup_fingerprints))
+        changes = write_rollup(rollup, fingerprints, rollup_csv, rollup_fingerprints, delta_output(delta_folder, rollup_csv))
+        print(f'Rolled up {len(years)} of {len(fingerprints)} years, {describe_changes(rollup_csv, changes)}')
+        record['rows_out'] = len(rollup)
+
+# Build the wages and hours datasets with their own response cache.
+# With refresh the tables are only downloaded and rebuilt when Stats Canada has released
+# new data or the reference rates changed since the last build, otherwise the existing CSVs are left untouched.
+# The hash of the reference rates is recorded next to the releases of the tables.
+# With delta_folder the rows that changed in each CSV are written there as well.
+def run_wages_and_hours(refresh=False, cache_folder=os.path.join('.http_cache', 'statcan'), delta_folder=None):
+    cache = ResponseCache(cache_folder)
+    with stage('check releases'):
+        releases = statcan.get_table_releases([table_id_wages, table_id_hours])
+    releases[reference_key] = {'hash': reference_hash(reference_folder)}
+    changed = statcan.changed_tables(releases, statcan.load_recorded_releases())
+    outputs_exist = all(os.path.exists(path) for path in [wages_and_hours_csv, living_wages_csv, rollup_csv])
+
+    if refresh and not changed and outputs_exist:
+        print('Stats Canada tables and reference rates unchanged since last build, skipping wages and hours refresh')
+    else:
+        build_wages_and_hours(cache, delta_folder)
+        statcan.save_recorded_releases(releases)
+    print(cache.report())